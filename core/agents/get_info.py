@@ -4,49 +4,49 @@ from loguru import logger
 import os
 import regex as re
 from llms.openai_wrapper import openai_llm as llm
+from llms.token_budget import batch_token_budget, count_tokens, pack_texts
 # from core.llms.siliconflow_wrapper import sfa_llm # or other llm wrapper
 from utils.general_utils import normalize_url, url_pattern
+from utils.ocr_cache import ImageOcrCache
+from utils.image_filter import ImageFilter
+from utils.url_classifier import common_file_exts, common_tlds, has_common_tld, has_non_image_file_ext, classify_urls, \
+    url_regex, md_img_regex, md_link_regex, img_marker_regex, js_link_regex
 from .get_info_prompts import *
 
 
-common_file_exts = [
-    'jpg', 'jpeg', 'png', 'gif', 'pdf', 'doc', 'docx', 'svg', 'm3u8',
-    'mp4', 'mp3', 'wav', 'avi', 'mov', 'wmv', 'flv', 'webp', 'webm',
-    'zip', 'rar', '7z', 'tar', 'gz', 'bz2',
-    'txt', 'csv', 'xls', 'xlsx', 'ppt', 'pptx',
-    'json', 'xml', 'yaml', 'yml', 'css', 'js', 'php', 'asp', 'jsp'
-]
-common_tlds = [
-    '.com', '.cn', '.net', '.org', '.edu', '.gov', '.io', '.co',
-    '.info', '.biz', '.me', '.tv', '.cc', '.xyz', '.app', '.dev',
-    '.cloud', '.ai', '.tech', '.online', '.store', '.shop', '.site',
-    '.top', '.vip', '.pro', '.ltd', '.group', '.team', '.work'
-]
+# 图片识别结果出来之前的占位文本：长于 5 个字符、不含 url 和标记符号，
+# 这样预扫描只会少报、不会多报需要识别的图片（不会浪费 VL 调用）
+img_placeholder = 'pending image recognition'
+
 
 async def pre_process(raw_markdown: str, base_url: str, used_img: list[str], 
                         recognized_img_cache: dict, existing_urls: set = set(), 
-                        test_mode: bool = False) -> tuple[dict, list[str], list[str], dict]:
+                        test_mode: bool = False, img_scores: dict = None) -> tuple[dict, list[str], list[str], dict]:
 
-    link_dict = {}
+    used_img = set(used_img)
+    # crawl4ai 给出的图片有用度评分（media['images'] 里的 score），用于决定送 VL 模型时的 detail
+    img_scores = img_scores or {}
 
     # for special url formate from craw4ai-de 0.4.247
-    raw_markdown = re.sub(r'<javascript:.*?>', '<javascript:>', raw_markdown).strip()
+    raw_markdown = js_link_regex.sub('<javascript:>', raw_markdown).strip()
 
     # 处理图片标记 ![alt](src)，使用非贪婪匹配并考虑嵌套括号的情况
-    i_pattern = r'(!\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\))'
-    matches = re.findall(i_pattern, raw_markdown, re.DOTALL)
-    for _sec, alt, src in matches:
-        # 替换为新格式 §alt||src§
-        raw_markdown = raw_markdown.replace(_sec, f'§{alt}||{src}§', 1)
+    # 一次扫描替换为新格式 §alt||src§（逐个 str.replace 每次都要复制整页，大页面上是平方复杂度）
+    raw_markdown = md_img_regex.sub(lambda m: f'§{m.group(2)}||{m.group(3)}§', raw_markdown)
 
-    async def check_url_text(text) -> tuple[int, str]:
+    def check_url_text(text: str, link_dict: dict, pending_imgs: dict) -> tuple[int, str]:
+        # 不在这里等待图片识别：未识别的图片记入 pending_imgs，先用占位文本顶替
         score = 0
         _valid_len = len(text.strip())
 
         # 找到所有[part0](part1)格式的片段，使用非贪婪匹配并考虑嵌套括号的情况
-        link_pattern = r'(\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\))'
-        matches = re.findall(link_pattern, text, re.DOTALL)
-        for _sec, link_text, link_url in matches:
+        # 按匹配位置拼接片段，整段只扫描一次
+        fragments = []
+        cursor = 0
+        for match in md_link_regex.finditer(text):
+            _sec, link_text, link_url = match.groups()
+            fragments.append(text[cursor:match.start()])
+            cursor = match.end()
             # 存在“”嵌套情况，需要先提取出url
             _title = re.sub(url_pattern, '', link_url, re.DOTALL).strip()
             _title = _title.strip('"')
@@ -62,17 +62,16 @@ async def pre_process(raw_markdown: str, base_url: str, used_img: list[str],
             else:
                 _url = re.sub(quote_pattern, '', link_url, re.DOTALL).strip()
             """
-            _url = re.findall(url_pattern, link_url)
+            _url = url_regex.findall(link_url)
             if not _url or _url[0].startswith(('#', 'javascript:')):
-                text = text.replace(_sec, link_text, 1)
+                fragments.append(link_text)
                 continue
             score += 1
             _valid_len = _valid_len - len(_sec)
             url = normalize_url(_url[0], base_url)
             
             # 分离§§内的内容和后面的内容
-            img_marker_pattern = r'§(.*?)\|\|(.*?)§'
-            inner_matches = re.findall(img_marker_pattern, link_text, re.DOTALL)
+            inner_matches = [(m.group(2), m.group(3)) for m in img_marker_regex.finditer(link_text)]
             for alt, src in inner_matches:
                 link_text = link_text.replace(f'§{alt}||{src}§', '')
 
@@ -87,67 +86,83 @@ async def pre_process(raw_markdown: str, base_url: str, used_img: list[str],
                         _key = f"[img{len(link_dict)+1}]"
                         link_dict[_key] = img_src
                         link_text = img_alt
-                    elif any(img_src.endswith(tld) or img_src.endswith(tld + '/') for tld in common_tlds):
+                    elif has_common_tld(img_src):
                         _key = f"[img{len(link_dict)+1}]"
                         link_dict[_key] = img_src
                         link_text = img_alt
-                    elif any(img_src.endswith(ext) for ext in common_file_exts if ext not in ['jpg', 'jpeg', 'png']):
+                    elif has_non_image_file_ext(img_src):
                         _key = f"[img{len(link_dict)+1}]"
                         link_dict[_key] = img_src
                         link_text = img_alt
                     else:
                         if img_src not in recognized_img_cache:
-                            recognized_img_cache[img_src] = await extract_info_from_img(img_src)
+                            pending_imgs[img_src] = None
                         _key = f"[img{len(link_dict)+1}]"
                         link_dict[_key] = img_src
-                        link_text = recognized_img_cache[img_src]
+                        link_text = recognized_img_cache.get(img_src, img_placeholder)
                 else:
                     link_text = img_alt
 
             _key = f"[{len(link_dict)+1}]"
             link_dict[_key] = url
-            text = text.replace(_sec, link_text + _key, 1)
- 
+            fragments.append(link_text + _key)
+        fragments.append(text[cursor:])
+        text = ''.join(fragments)
+
         # 处理文本中的其他图片标记
         img_pattern = r'(§(.*?)\|\|(.*?)§)'
-        matches = re.findall(img_pattern, text, re.DOTALL)
         remained_text = re.sub(img_pattern, '', text, re.DOTALL).strip()
         remained_text_len = len(remained_text)
-        for _sec, alt, src in matches:
+        fragments = []
+        cursor = 0
+        for match in img_marker_regex.finditer(text):
+            _sec, alt, src = match.groups()
+            fragments.append(text[cursor:match.start()])
+            cursor = match.end()
             if not src or src.startswith('#') or src not in used_img:
-                text = text.replace(_sec, alt, 1)
+                fragments.append(alt)
                 continue
             img_src = normalize_url(src, base_url)
             if not img_src:
-                text = text.replace(_sec, alt, 1)
+                fragments.append(alt)
             elif remained_text_len > 5 or len(alt) > 2:
                 _key = f"[{len(link_dict)+1}]"
                 link_dict[_key] = img_src
-                text = text.replace(_sec, alt + _key, 1)
-            elif any(img_src.endswith(tld) or img_src.endswith(tld + '/') for tld in common_tlds):
+                fragments.append(alt + _key)
+            elif has_common_tld(img_src):
                 _key = f"[{len(link_dict)+1}]"
                 link_dict[_key] = img_src
-                text = text.replace(_sec, alt + _key, 1)
-            elif any(img_src.endswith(ext) for ext in common_file_exts if ext not in ['jpg', 'jpeg', 'png']):
+                fragments.append(alt + _key)
+            elif has_non_image_file_ext(img_src):
                 _key = f"[{len(link_dict)+1}]"
                 link_dict[_key] = img_src
-                text = text.replace(_sec, alt + _key, 1)
+                fragments.append(alt + _key)
             else:
                 if img_src not in recognized_img_cache:
-                    recognized_img_cache[img_src] = await extract_info_from_img(img_src)
+                    pending_imgs[img_src] = None
                 _key = f"[{len(link_dict)+1}]"
                 link_dict[_key] = img_src
-                text = text.replace(_sec, recognized_img_cache[img_src] + _key, 1)
+                fragments.append(recognized_img_cache.get(img_src, img_placeholder) + _key)
+        fragments.append(text[cursor:])
+        text = ''.join(fragments)
 
         # 处理文本中的"野 url"，使用更精确的正则表达式
-        matches = re.findall(url_pattern, text)
-        for url in matches:
-            url = normalize_url(url, base_url)
+        fragments = []
+        cursor = 0
+        for match in url_regex.finditer(text):
+            raw_url = match.group(1)
+            url = normalize_url(raw_url, base_url)
             _key = f"[{len(link_dict)+1}]"
             link_dict[_key] = url
-            text = text.replace(url, _key, 1)
+            # 规范化后变了样的 url（如 www. 开头）在原文中找不到，保持原样
+            if url == raw_url:
+                fragments.append(text[cursor:match.start()])
+                fragments.append(_key)
+                cursor = match.end()
             score += 1
             _valid_len = _valid_len - len(url)
+        fragments.append(text[cursor:])
+        text = ''.join(fragments)
         
         if score == 0:
             # 如果没有任何链接，则认为这是一段纯文本
@@ -166,7 +181,7 @@ async def pre_process(raw_markdown: str, base_url: str, used_img: list[str],
         section_remain = re.sub(r'\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\)', '', _sec, re.DOTALL).strip()
         section_remain_len = len(section_remain)
         # 更新正则表达式以处理嵌套括号
-        total_links = len(re.findall(r'\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\)', _sec, re.DOTALL))
+        total_links = len(md_link_regex.findall(_sec))
         ratio = total_links / section_remain_len if section_remain_len != 0 else 1
         if ratio > 0.05:
             if test_mode:
@@ -187,44 +202,53 @@ async def pre_process(raw_markdown: str, base_url: str, used_img: list[str],
                 print('-' * 50)
             sections = sections[:-1]
 
+    def split_long_text(text: str) -> list[str]:
+        # 超过 30000 字符的段落按行切成不超过约 29000 字符的块
+        if len(text) <= 30000:
+            return [text]
+        chunks = []
+        lines = text.split('\n')
+        _lines = []
+        _len = 0
+        for i, l in enumerate(lines):
+            _lines.append(f'{l}\n')
+            _len += len(l) + 1
+            if _len > 29000 or i == len(lines) - 1:
+                chunks.append(''.join(_lines))
+                _lines = []
+                _len = 0
+        return chunks
+
+    # 两阶段：先不等待地重写全部段落，收集需要识别的图片，并发识别后再重写一遍。
+    # 识别结果会影响同段后续的判断（如剩余文本长度），所以重复到不再出现新的待识别图片为止，
+    # 最后一轮所用的识别结果与逐张串行识别时完全相同，输出也相同。
+    while True:
+        link_dict = {}
+        pending_imgs = {}
+        checked = [check_url_text(section, link_dict, pending_imgs) for section in sections]
+        if not pending_imgs:
+            break
+        results = await asyncio.gather(*[extract_info_from_img(img_src, img_scores.get(img_src))
+                                         for img_src in pending_imgs])
+        recognized_img_cache.update(zip(pending_imgs, results))
+
     links_parts = []
     contents = []
-    for section in sections:
-        ratio, text = await check_url_text(section)
+    for ratio, text in checked:
         if ratio < 90:
             if test_mode:
                 print('\033[32mthis is a links part\033[0m')
                 print(ratio, '\n')
                 print(text)
                 print('-' * 50)
-            if len(text) > 30000:
-                lines = text.split('\n')
-                _text = ''
-                while lines:
-                    l = lines.pop(0)
-                    _text = f'{_text}{l}\n'
-                    if len(_text) > 29000 or len(lines) == 0:
-                        links_parts.append(_text)
-                        _text = ''
-            else:
-                links_parts.append(text)
+            links_parts.extend(split_long_text(text))
         else:
             if test_mode:
                 print('\033[34mthis is a content part\033[0m')
                 print(ratio, '\n')
                 print(text)
                 print('-' * 50)
-            if len(text) > 30000:
-                lines = text.split('\n')
-                _text = ''
-                while lines:
-                    l = lines.pop(0)
-                    _text = f'{_text}{l}\n'
-                    if len(_text) > 29000 or len(lines) == 0:
-                        contents.append(_text)
-                        _text = ''
-            else:
-                contents.append(text)
+            contents.extend(split_long_text(text))
     return link_dict, links_parts, contents, recognized_img_cache
 
 
@@ -233,15 +257,49 @@ if not vl_model:
     print("VL_MODEL not set, will skip extracting info from img, some info may be lost!")
 
 
-async def extract_info_from_img(url: str) -> str:
+# 图片识别结果（包括 NA）按 url + 图片内容持久缓存，跨关注点、跨进程共享
+ocr_cache = ImageOcrCache(ttl=float(os.environ.get('OCR_CACHE_TTL', 30 * 24 * 3600)),
+                          recheck_after=float(os.environ.get('OCR_CACHE_RECHECK', 24 * 3600)))
+
+# 送 VL 模型前的本地预筛：只看 ocr_cache 取指纹时已经拿到的前 64KB（尺寸、字节数、感知哈希）
+img_filter = ImageFilter(min_side=int(os.environ.get('IMAGE_MIN_SIDE', 100)),
+                         min_bytes=int(os.environ.get('IMAGE_MIN_BYTES', 2048)),
+                         low_detail_side=int(os.environ.get('IMAGE_LOW_DETAIL_SIDE', 512)))
+
+
+async def extract_info_from_img(url: str, score: float = None) -> str:
     if not vl_model:
         return '§to_be_recognized_by_visual_llm§'
 
+    # 近期确认过内容的 url 直接用缓存，不再发请求取指纹
+    cached = await ocr_cache.get_by_url(url)
+    if cached:
+        return cached
+
+    head, total = await ocr_cache.fetch_head(url)
+    key = await ocr_cache.make_key(url, head, total)
+    cached = await ocr_cache.get(key)
+    if cached:
+        return cached
+
+    # 图标、占位图、已知 logo 的近似图直接按 NA 处理；小图或评分低的图用 low detail（约 85 tokens）
+    image_hash = img_filter.fingerprint(head, total)
+    detail = await img_filter.check(head, total, score, image_hash)
+    if detail == 'skip':
+        # 跳过的结论也缓存，图标、logo 不必每次抓取都重新取头部判断
+        await ocr_cache.set(key, url, 'NA')
+        return 'NA'
+
+    # llm 响应缓存只认 url，同一 url 下换了图片也会命中，这里交给 ocr_cache 判断
     llm_output = await llm([{"role": "user",
-        "content": [{"type": "image_url", "image_url": {"url": url, "detail": "high"}},
+        "content": [{"type": "image_url", "image_url": {"url": url, "detail": detail}},
         {"type": "text", "text": "提取图片中的所有文字，如果图片不包含文字或者文字很少或者你判断图片仅是网站logo、商标、图标等，则输出NA。注意请仅输出提取出的文字，不要输出别的任何内容。"}]}],
-        model=vl_model)
+        model=vl_model, use_cache=False)
 
+    await ocr_cache.set(key, url, llm_output)
+    # VL 模型判为 NA 的小图记为 logo，之后的近似图不再送模型
+    if llm_output.strip() == 'NA':
+        await img_filter.add_logo(image_hash, url)
     return llm_output
 
 
@@ -276,41 +334,42 @@ async def get_more_related_urls(texts: list[str], link_dict: dict, prompts: list
                                 _logger: logger = None) -> set:
     
     sys_prompt, suffix, model = prompts
-    text_batch = ''
+    # batches are sized in tokens (prompt included), chinese and english pages differ a lot per char
+    budget = max(batch_token_budget('get_link', model) - count_tokens(f'{sys_prompt}{suffix}', model), 256)
+
+    async def classify_batch(text_batch: str) -> list[str]:
+        content = f'<text>\n{text_batch}</text>\n\n{suffix}'
+        result = await llm(
+                [{'role': 'system', 'content': sys_prompt}, {'role': 'user', 'content': content}],
+                model=model, temperature=0.1)
+
+        if test_mode:
+            print(f"llm output:\n {result}")
+
+        marks = []
+        result = re.findall(r'<answer>(.*?)</answer>', result, re.DOTALL)
+        if result:
+            links = re.findall(r'\[\d+]', result[-1])
+            for link in links:
+                if link not in link_dict or link not in text_batch:
+                    if _logger:
+                        _logger.warning(f"model generating hallucination:\n{link}\n{result[-1]}\n{text_batch}")
+                    if test_mode:
+                        print(f"model hallucination:\n{link}\n{result[-1]}\n{text_batch}")
+                    continue
+                marks.append(link)
+        return marks
+
+    # batches run concurrently, the llm wrapper's limiter decides how many are in flight
+    text_batches = [''.join(f'{t}\n\n' for t in batch) for batch in pack_texts(texts, budget, model)]
+    results = await asyncio.gather(*[classify_batch(text_batch) for text_batch in text_batches])
+    # gather keeps batch order, so the merge does not depend on which call returned first
     cache = set()
-    while texts:
-        t = texts.pop(0)
-        text_batch = f'{text_batch}{t}\n\n'
-        if len(text_batch) > 2048 or len(texts) == 0:
-            content = f'<text>\n{text_batch}</text>\n\n{suffix}'
-            result = await llm(
-                    [{'role': 'system', 'content': sys_prompt}, {'role': 'user', 'content': content}],
-                    model=model, temperature=0.1)
+    for marks in results:
+        cache.update(marks)
 
-            if test_mode:
-                print(f"llm output:\n {result}")
-
-            result = re.findall(r'<answer>(.*?)</answer>', result, re.DOTALL)
-            if result:
-                links = re.findall(r'\[\d+]', result[-1])
-                for link in links:
-                    if link not in link_dict or link not in text_batch:
-                        if _logger:
-                            _logger.warning(f"model generating hallucination:\n{link}\n{result[-1]}\n{text_batch}")
-                        if test_mode:
-                            print(f"model hallucination:\n{link}\n{result[-1]}\n{text_batch}")
-                        continue
-                    cache.add(link)
-            text_batch = ''
-
-    more_urls = set()
-    for mark in cache:
-        url = link_dict[mark]
-        has_common_ext = any(url.endswith(ext) for ext in common_file_exts)
-        has_common_tld = any(url.endswith(tld) or url.endswith(tld + '/') for tld in common_tlds)
-        if has_common_ext or has_common_tld:
-            continue
-        more_urls.add(url)
+    urls = [link_dict[mark] for mark in cache]
+    more_urls = {url for url, _class in zip(urls, classify_urls(urls)) if not _class.file_ext and not _class.tld}
     
     return more_urls
     
@@ -329,15 +388,13 @@ async def get_info(texts: list[str], link_dict: dict, prompts: list[str], author
     if not texts:
         return []
 
+    header = f'Author: {author}\nPublish Date: {publish_date}\n'
+    budget = max(batch_token_budget('get_info', model) - count_tokens(f'{sys_prompt}{suffix}{header}', model), 512)
     batches = []
-    text_batch = f'Author: {author}\nPublish Date: {publish_date}\n'
-    while texts:
-        t = texts.pop(0)
-        text_batch = f'{text_batch}{t}# '
-        if len(text_batch) > 9999 or len(texts) == 0:
-            content = f'<text>\n{text_batch}</text>\n\n{suffix}'
-            batches.append(content)
-            text_batch = f'Author: {author}\nPublish Date: {publish_date}\n'
+    for batch in pack_texts(texts, budget, model):
+        text_batch = header + ''.join(f'{t}# ' for t in batch)
+        content = f'<text>\n{text_batch}</text>\n\n{suffix}'
+        batches.append(content)
 
     tasks = [
         llm([{'role': 'system', 'content': sys_prompt}, {'role': 'user', 'content': content}], model=model, temperature=0.1)
@@ -2,6 +2,7 @@
 import warnings
 
 from .async_webcrawler import AsyncWebCrawler
+from .async_dispatcher import RateLimiter
 from .async_configs import BrowserConfig, CrawlerRunConfig, CacheMode
 from .content_scraping_strategy import (
     ContentScrapingStrategy,
@@ -15,6 +16,7 @@ from .models import CrawlResult, MarkdownGenerationResult
 
 __all__ = [
     "AsyncWebCrawler",
+    "RateLimiter",
     "CrawlResult",
     "CacheMode",
     "ContentScrapingStrategy",
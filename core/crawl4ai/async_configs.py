@@ -171,6 +171,10 @@ class BrowserConfig():
         light_mode (bool): Disables certain background features for performance gains. Default: False.
         extra_args (list): Additional command-line arguments passed to the browser.
                            Default: [].
+        page_pool_size (int): Number of warm pages kept per context for reuse by crawls without a session_id.
+                              0 disables page recycling. Default: 4.
+        max_page_uses (int): Number of crawls a recycled page serves before it is closed, bounding leaks
+                             from long-lived pages. Default: 50.
     """
 
     def __init__(
@@ -209,6 +213,8 @@ class BrowserConfig():
         extra_args: list = None,
         debugging_port: int = 9222,
         host: str = "localhost",
+        page_pool_size: int = 4,
+        max_page_uses: int = 50,
     ):
         self.browser_type = browser_type
         self.headless = headless
@@ -241,6 +247,8 @@ class BrowserConfig():
         self.sleep_on_close = sleep_on_close
         self.verbose = verbose
         self.debugging_port = debugging_port
+        self.page_pool_size = page_pool_size
+        self.max_page_uses = max_page_uses
 
         fa_user_agenr_generator = ValidUAGenerator()
         if self.user_agent_mode == "random":
@@ -289,6 +297,8 @@ class BrowserConfig():
             text_mode=kwargs.get("text_mode", False),
             light_mode=kwargs.get("light_mode", False),
             extra_args=kwargs.get("extra_args", []),
+            page_pool_size=kwargs.get("page_pool_size", 4),
+            max_page_uses=kwargs.get("max_page_uses", 50),
         )
 
     def to_dict(self):
@@ -321,6 +331,8 @@ class BrowserConfig():
             "sleep_on_close": self.sleep_on_close,
             "verbose": self.verbose,
             "debugging_port": self.debugging_port,
+            "page_pool_size": self.page_pool_size,
+            "max_page_uses": self.max_page_uses,
         }
 
     def clone(self, **kwargs):
@@ -14,6 +14,7 @@ from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
 import hashlib
 import uuid
+from urllib.parse import urlparse
 from .js_snippet import load_js_script
 from .models import AsyncCrawlResponse
 from .config import SCREENSHOT_HEIGHT_TRESHOLD, DOWNLOAD_PAGE_TIMEOUT
@@ -313,6 +314,7 @@ class BrowserManager:
         playwright (Playwright): The Playwright instance
         sessions (dict): Dictionary to store session information
         session_ttl (int): Session timeout in seconds
+        idle_pages (dict): Warm pages waiting for reuse, keyed by config signature
     """
 
     def __init__(self, browser_config: BrowserConfig, logger=None):
@@ -340,6 +342,15 @@ class BrowserManager:
         self.contexts_by_config = {}
         self._contexts_lock = asyncio.Lock() 
 
+        # Page recycling: warm pages per config signature, plus bookkeeping for pages handed out
+        self.idle_pages: Dict[str, List[Page]] = {}
+        self._page_signatures: Dict[Page, str] = {}
+        self._page_uses: Dict[Page, int] = {}
+
+        # Per-context state so cookies and init scripts are installed once, not on every crawl
+        self._context_hosts: Dict[BrowserContext, set] = {}
+        self._navigator_contexts = set()
+
         # Initialize ManagedBrowser if needed
         if self.config.use_managed_browser:
             self.managed_browser = ManagedBrowser(
@@ -553,6 +564,7 @@ class BrowserManager:
                 or crawlerRunConfig.magic
             ):
                 await context.add_init_script(load_js_script("navigator_overrider"))
+                self._navigator_contexts.add(context)
 
     async def create_browser_context(self, crawlerRunConfig: CrawlerRunConfig = None):
         """
@@ -719,14 +731,13 @@ class BrowserManager:
             self.sessions[crawlerRunConfig.session_id] = (context, page, time.time())
             return page, context
 
+        config_signature = self._make_config_signature(crawlerRunConfig)
+
         # If using a managed browser, just grab the shared default_context
         if self.config.use_managed_browser:
             context = self.default_context
-            page = await context.new_page()
         else:
             # Otherwise, check if we have an existing context for this config
-            config_signature = self._make_config_signature(crawlerRunConfig)
-
             async with self._contexts_lock:
                 if config_signature in self.contexts_by_config:
                     context = self.contexts_by_config[config_signature]
@@ -736,8 +747,20 @@ class BrowserManager:
                     await self.setup_context(context, crawlerRunConfig)
                     self.contexts_by_config[config_signature] = context
 
-            # Create a new page from the chosen context
+        # Prefer a warm page from the pool, otherwise create a new page from the chosen context
+        page = None
+        if not crawlerRunConfig.session_id:
+            idle = self.idle_pages.get(config_signature, [])
+            while idle and page is None:
+                candidate = idle.pop()
+                if candidate.is_closed():
+                    self._forget_page(candidate)
+                else:
+                    page = candidate
+        if page is None:
             page = await context.new_page()
+            if not crawlerRunConfig.session_id:
+                self._page_signatures[page] = config_signature
 
         # If a session_id is specified, store this session so we can reuse later
         if crawlerRunConfig.session_id:
@@ -745,6 +768,96 @@ class BrowserManager:
 
         return page, context
 
+    def _is_recyclable(self, crawlerRunConfig: CrawlerRunConfig) -> bool:
+        """Pages whose viewport may have been changed by the crawl are not worth resetting."""
+        return (
+            self.config.page_pool_size > 0
+            and not crawlerRunConfig.session_id
+            and not crawlerRunConfig.adjust_viewport_to_content
+            and not crawlerRunConfig.screenshot
+        )
+
+    def _forget_page(self, page: Page):
+        self._page_signatures.pop(page, None)
+        self._page_uses.pop(page, None)
+
+    async def release_page(self, page: Page, crawlerRunConfig: CrawlerRunConfig):
+        """
+        Hand a page back after a crawl.
+
+        How it works:
+        1. Session pages are kept as they are, the session owns them.
+        2. Pages that can not be recycled, reached max_page_uses or overflow the pool are closed.
+        3. Otherwise storage is cleared, the page is reset to about:blank and parked in the pool
+           of its config signature, ready for the next get_page with the same signature.
+
+        Args:
+            page (Page): The page returned by get_page
+            crawlerRunConfig (CrawlerRunConfig): The config the page was requested with
+        """
+        if crawlerRunConfig.session_id:
+            return
+
+        signature = self._page_signatures.get(page)
+        uses = self._page_uses.get(page, 0) + 1
+        idle = self.idle_pages.setdefault(signature, []) if signature else []
+
+        if (
+            signature is None
+            or page.is_closed()
+            or not self._is_recyclable(crawlerRunConfig)
+            or uses >= self.config.max_page_uses
+            or len(idle) >= self.config.page_pool_size
+        ):
+            self._forget_page(page)
+            if not page.is_closed():
+                await page.close()
+            return
+
+        try:
+            await page.evaluate(
+                "() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }"
+            )
+            await page.goto("about:blank")
+        except Exception:
+            self._forget_page(page)
+            if not page.is_closed():
+                await page.close()
+            return
+
+        self._page_uses[page] = uses
+        idle.append(page)
+
+    async def prepare_context(
+        self, context: BrowserContext, url: str, crawlerRunConfig: CrawlerRunConfig
+    ):
+        """
+        Add the default cookie for the url's host and the navigator overrider to the context.
+
+        Both live on the context rather than the page, so each is only installed once per context
+        (per host for the cookie) instead of on every crawl.
+
+        Args:
+            context (BrowserContext): The context of the page about to crawl
+            url (str): The URL about to be crawled
+            crawlerRunConfig (CrawlerRunConfig): Configuration object of the crawl
+        """
+        host = urlparse(url).netloc
+        hosts = self._context_hosts.setdefault(context, set())
+        if host not in hosts:
+            await context.add_cookies(
+                [{"name": "cookiesEnabled", "value": "true", "url": url}]
+            )
+            hosts.add(host)
+
+        if (
+            crawlerRunConfig.override_navigator
+            or crawlerRunConfig.simulate_user
+            or crawlerRunConfig.magic
+        ) and context not in self._navigator_contexts:
+            await context.add_init_script(load_js_script("navigator_overrider"))
+            self._navigator_contexts.add(context)
+
     async def kill_session(self, session_id: str):
         """
         Kill a browser session and clean up resources.
@@ -779,6 +892,13 @@ class BrowserManager:
         for session_id in session_ids:
             await self.kill_session(session_id)
 
+        # Drop the warm pages, they are closed together with their contexts below
+        self.idle_pages.clear()
+        self._page_signatures.clear()
+        self._page_uses.clear()
+        self._context_hosts.clear()
+        self._navigator_contexts.clear()
+
         # Now close all contexts we created. This reclaims memory from ephemeral contexts.
         for ctx in self.contexts_by_config.values():
             try:
@@ -1282,18 +1402,15 @@ class AsyncPlaywrightCrawlerStrategy(AsyncCrawlerStrategy):
         # Get page for session
         page, context = await self.browser_manager.get_page(crawlerRunConfig=config)
 
-        # Add default cookie
-        await context.add_cookies(
-            [{"name": "cookiesEnabled", "value": "true", "url": url}]
-        )
-
-        # Handle navigator overrides
-        if config.override_navigator or config.simulate_user or config.magic:
-            await context.add_init_script(load_js_script("navigator_overrider"))
+        # Add default cookie and navigator overrides (once per context)
+        await self.browser_manager.prepare_context(context, url, config)
 
         # Call hook after page creation
         await self.execute_hook("on_page_context_created", page, context=context, config=config)
 
+        # Listeners added for this crawl only, removed before the page is handed back
+        page_listeners = []
+
         # Set up console logging if requested
         if config.log_console:
 
@@ -1313,8 +1430,8 @@ class AsyncPlaywrightCrawlerStrategy(AsyncCrawlerStrategy):
                         params={"msg": msg.text},
                     )
 
-            page.on("console", log_consol)
-            page.on("pageerror", lambda e: log_consol(e, "error"))
+            page_listeners.append(("console", log_consol))
+            page_listeners.append(("pageerror", lambda e: log_consol(e, "error")))
 
         try:
             # Get SSL certificate information if requested and URL is HTTPS
@@ -1324,13 +1441,18 @@ class AsyncPlaywrightCrawlerStrategy(AsyncCrawlerStrategy):
 
             # Set up download handling
             if self.browser_config.accept_downloads:
-                page.on(
-                    "download",
-                    lambda download: asyncio.create_task(
-                        self._handle_download(download)
-                    ),
+                page_listeners.append(
+                    (
+                        "download",
+                        lambda download: asyncio.create_task(
+                            self._handle_download(download)
+                        ),
+                    )
                 )
 
+            for event, listener in page_listeners:
+                page.on(event, listener)
+
             # Handle page navigation and content loading
             if not config.js_only:
                 await self.execute_hook("before_goto", page, context=context, url=url, config=config)
@@ -1639,9 +1761,10 @@ class AsyncPlaywrightCrawlerStrategy(AsyncCrawlerStrategy):
             raise e
 
         finally:
-            # If no session_id is given we should close the page
-            if not config.session_id:
-                await page.close()
+            for event, listener in page_listeners:
+                page.remove_listener(event, listener)
+            # If no session_id is given the page goes back to the pool (or is closed)
+            await self.browser_manager.release_page(page, config)
 
     async def _handle_full_page_scan(self, page: Page, scroll_delay: float = 0.1):
         """
@@ -1,12 +1,12 @@
 import os
+import time
 import aiosqlite
 import asyncio
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Iterable, Tuple, Set
 from contextlib import asynccontextmanager
 import json  # Added for serialization/deserialization
-from .utils import ensure_content_dirs, generate_content_hash
 from .models import CrawlResult
-import aiofiles
+from .blob_store import BlobStore, create_blob_store
 from .async_logger import AsyncLogger
 from .utils import get_error_context, create_box_message
 
@@ -22,17 +22,105 @@ os.makedirs(DB_PATH, exist_ok=True)
 DB_PATH = os.path.join(base_directory, "crawl4ai.db")
 
 
+# Columns that can be projected in aget_cached_url, in table order
+_CACHED_COLUMNS = [
+    "html",
+    "cleaned_html",
+    "markdown",
+    "extracted_content",
+    "media",
+    "links",
+    "metadata",
+    "screenshot",
+    "response_headers",
+    "downloaded_files",
+]
+
+# Content columns and the blob store type of what they reference
+_BLOB_COLUMNS = {
+    "html": "html",
+    "cleaned_html": "cleaned",
+    "markdown": "markdown",
+    "extracted_content": "extracted",
+    "screenshot": "screenshot",
+}
+
+# Bookkeeping columns for eviction, added to tables created before them
+_STATS_COLUMNS = {
+    "fetched_at": "REAL DEFAULT 0",
+    "last_access": "REAL DEFAULT 0",
+    "access_count": "INTEGER DEFAULT 0",
+    # Bytes of the entry's blobs and json fields, -1 until measured
+    "size": "INTEGER DEFAULT -1",
+}
+
+_EXPECTED_COLUMNS = {
+    "url",
+    "html",
+    "cleaned_html",
+    "markdown",
+    "extracted_content",
+    "success",
+    "media",
+    "links",
+    "metadata",
+    "screenshot",
+    "response_headers",
+    "downloaded_files",
+} | set(_STATS_COLUMNS)
+
+
 class AsyncDatabaseManager:
-    def __init__(self, pool_size: int = 10, max_retries: int = 3):
+    """
+    Cache database access through long-lived pooled connections.
+
+    Up to `pool_size` read-only connections serve lookups concurrently (WAL lets readers run next to
+    the writer), and a single writer connection serializes every write behind a lock, so writers never
+    fight over the database lock. Connections are opened once and reused, which also keeps sqlite's
+    per-connection prepared statement cache warm. The schema is created, migrated and verified once,
+    on first use.
+
+    Every entry records when it was fetched, last read or written and how often it was read, plus
+    its size. A background task started on first use (every `compact_interval` seconds) evicts the
+    entries idle for more than `max_age` seconds, then the least recently used ones while the cache
+    is over `max_bytes`, and deletes content blobs no entry references anymore. Zero disables a
+    policy. Read statistics are buffered in memory and written in one batch, so cache hits stay
+    read-only.
+    """
+    def __init__(
+        self,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        blob_store: Optional[BlobStore] = None,
+        max_age: float = float(os.getenv("CACHE_MAX_AGE", 30 * 24 * 3600)),
+        max_bytes: int = int(os.getenv("CACHE_MAX_BYTES", 2 * 1024 ** 3)),
+        compact_interval: float = float(os.getenv("CACHE_COMPACT_INTERVAL", 3600)),
+    ):
         self.db_path = DB_PATH
-        self.content_paths = ensure_content_dirs(os.path.dirname(DB_PATH))
+        # html / markdown / screenshots... live outside sqlite, the table keeps their hashes
+        self.blob_store = blob_store or create_blob_store(os.path.dirname(DB_PATH))
         self.pool_size = pool_size
         self.max_retries = max_retries
-        self.connection_pool: Dict[int, aiosqlite.Connection] = {}
+        # Idle read-only connections; at most pool_size are ever opened
+        self.connection_pool: asyncio.Queue = asyncio.Queue()
+        self._all_readers: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
         self.pool_lock = asyncio.Lock()
+        self.write_lock = asyncio.Lock()
         self.init_lock = asyncio.Lock()
-        self.connection_semaphore = asyncio.Semaphore(pool_size)
         self._initialized = False
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.compact_interval = compact_interval
+        # Blobs younger than this are never collected, a writer may be about to reference them
+        self.gc_grace = 3600
+        # The orphan sweep covers 16 of the 256 hash prefixes per compaction, to bound its memory
+        self._gc_round = 0
+        self._compaction_task: Optional[asyncio.Task] = None
+        # url -> (last access, reads not yet written)
+        self._pending_access: Dict[str, Tuple[float, int]] = {}
+        # Flushes started by _note_access, the loop only keeps weak references to tasks
+        self._flush_tasks: Set[asyncio.Task] = set()
         self.logger = AsyncLogger(
             log_file=os.path.join(base_directory, ".crawl4ai", "crawler_db.log"),
             verbose=False,
@@ -40,24 +128,26 @@ class AsyncDatabaseManager:
         )
 
     async def initialize(self):
-        """Initialize the database and connection pool"""
+        """Initialize the database schema and verify it, done once before the pool is used"""
         try:
             self.logger.info("Initializing database", tag="INIT")
             # Ensure the database file exists
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
 
-            # Always ensure base table exists
+            # Always ensure base table exists and carries the columns added since it was created
             await self.ainit_db()
+            await self.update_db_schema()
 
-            # Verify the table exists
+            # Verify database structure
             async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
-                async with db.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name='crawled_data'"
-                ) as cursor:
-                    result = await cursor.fetchone()
-                    if not result:
-                        raise Exception("crawled_data table was not created")
-
+                await db.execute("PRAGMA journal_mode = WAL")
+                async with db.execute("PRAGMA table_info(crawled_data)") as cursor:
+                    columns = await cursor.fetchall()
+                if not columns:
+                    raise Exception("crawled_data table was not created")
+                missing_columns = _EXPECTED_COLUMNS - {col[1] for col in columns}
+                if missing_columns:
+                    raise ValueError(f"Database missing columns: {missing_columns}")
 
             self.logger.success(
                 "Database initialization completed successfully", tag="COMPLETE"
@@ -77,92 +167,62 @@ class AsyncDatabaseManager:
 
     async def cleanup(self):
         """Cleanup connections when shutting down"""
+        if self._compaction_task is not None:
+            self._compaction_task.cancel()
+            self._compaction_task = None
+        await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        try:
+            await self.aflush_access_stats()
+        except Exception:
+            pass
         async with self.pool_lock:
-            for conn in self.connection_pool.values():
+            for conn in self._all_readers:
                 await conn.close()
-            self.connection_pool.clear()
-
-    @asynccontextmanager
-    async def get_connection(self):
-        """Connection pool manager with enhanced error handling"""
-        if not self._initialized:
-            async with self.init_lock:
-                if not self._initialized:
-                    try:
-                        await self.initialize()
-                        self._initialized = True
-                    except Exception as e:
-                        import sys
-
-                        error_context = get_error_context(sys.exc_info())
-                        self.logger.error(
-                            message="Database initialization failed:\n{error}\n\nContext:\n{context}\n\nTraceback:\n{traceback}",
-                            tag="ERROR",
-                            force_verbose=True,
-                            params={
-                                "error": str(e),
-                                "context": error_context["code_context"],
-                                "traceback": error_context["full_traceback"],
-                            },
-                        )
-                        raise
-
-        await self.connection_semaphore.acquire()
-        task_id = id(asyncio.current_task())
+            self._all_readers.clear()
+            self.connection_pool = asyncio.Queue()
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+
+    async def _ensure_initialized(self):
+        if self._initialized:
+            return
+        async with self.init_lock:
+            if self._initialized:
+                return
+            try:
+                await self.initialize()
+                self._initialized = True
+                if self.compact_interval > 0 and self._compaction_task is None:
+                    self._compaction_task = asyncio.create_task(self._compaction_loop())
+            except Exception as e:
+                import sys
+
+                error_context = get_error_context(sys.exc_info())
+                self.logger.error(
+                    message="Database initialization failed:\n{error}\n\nContext:\n{context}\n\nTraceback:\n{traceback}",
+                    tag="ERROR",
+                    force_verbose=True,
+                    params={
+                        "error": str(e),
+                        "context": error_context["code_context"],
+                        "traceback": error_context["full_traceback"],
+                    },
+                )
+                raise
 
+    async def _open_connection(self, read_only: bool) -> aiosqlite.Connection:
+        """Open a pooled connection, its pragmas are set once for its whole life"""
         try:
-            async with self.pool_lock:
-                if task_id not in self.connection_pool:
-                    try:
-                        conn = await aiosqlite.connect(self.db_path, timeout=30.0)
-                        await conn.execute("PRAGMA journal_mode = WAL")
-                        await conn.execute("PRAGMA busy_timeout = 5000")
-
-                        # Verify database structure
-                        async with conn.execute(
-                            "PRAGMA table_info(crawled_data)"
-                        ) as cursor:
-                            columns = await cursor.fetchall()
-                            column_names = [col[1] for col in columns]
-                            expected_columns = {
-                                "url",
-                                "html",
-                                "cleaned_html",
-                                "markdown",
-                                "extracted_content",
-                                "success",
-                                "media",
-                                "links",
-                                "metadata",
-                                "screenshot",
-                                "response_headers",
-                                "downloaded_files",
-                            }
-                            missing_columns = expected_columns - set(column_names)
-                            if missing_columns:
-                                raise ValueError(
-                                    f"Database missing columns: {missing_columns}"
-                                )
-
-                        self.connection_pool[task_id] = conn
-                    except Exception as e:
-                        import sys
-
-                        error_context = get_error_context(sys.exc_info())
-                        error_message = (
-                            f"Unexpected error in db get_connection at line {error_context['line_no']} "
-                            f"in {error_context['function']} ({error_context['filename']}):\n"
-                            f"Error: {str(e)}\n\n"
-                            f"Code context:\n{error_context['code_context']}"
-                        )
-                        self.logger.error(
-                            message=create_box_message(error_message, type="error"),
-                        )
-
-                        raise
-
-            yield self.connection_pool[task_id]
-
+            conn = aiosqlite.connect(self.db_path, timeout=30.0, cached_statements=256)
+            # Pooled connections live as long as the process, their worker thread must not block interpreter exit
+            getattr(conn, "_thread", conn).daemon = True
+            conn = await conn
+            await conn.execute("PRAGMA busy_timeout = 5000")
+            await conn.execute("PRAGMA synchronous = NORMAL")
+            if read_only:
+                await conn.execute("PRAGMA query_only = 1")
+            return conn
         except Exception as e:
             import sys
 
@@ -177,20 +237,49 @@ class AsyncDatabaseManager:
                 message=create_box_message(error_message, type="error"),
             )
             raise
+
+    async def _acquire_reader(self) -> aiosqlite.Connection:
+        async with self.pool_lock:
+            if self.connection_pool.empty() and len(self._all_readers) < self.pool_size:
+                conn = await self._open_connection(read_only=True)
+                self._all_readers.append(conn)
+                return conn
+        return await self.connection_pool.get()
+
+    @asynccontextmanager
+    async def get_connection(self, write: bool = True):
+        """
+        Borrow a pooled connection: the single writer (held exclusively until the block exits)
+        or one of the read-only connections.
+        """
+        await self._ensure_initialized()
+
+        if write:
+            async with self.write_lock:
+                if self._writer is None:
+                    self._writer = await self._open_connection(read_only=False)
+                try:
+                    yield self._writer
+                except Exception:
+                    # Leave the shared writer clean for the next caller
+                    await self._writer.rollback()
+                    raise
+            return
+
+        conn = await self._acquire_reader()
+        try:
+            yield conn
         finally:
-            async with self.pool_lock:
-                if task_id in self.connection_pool:
-                    await self.connection_pool[task_id].close()
-                    del self.connection_pool[task_id]
-            self.connection_semaphore.release()
-
-    async def execute_with_retry(self, operation, *args):
-        """Execute database operations with retry logic"""
+            self.connection_pool.put_nowait(conn)
+
+    async def execute_with_retry(self, operation, *args, write: bool = True):
+        """Execute database operations with retry logic, writes are committed"""
         for attempt in range(self.max_retries):
             try:
-                async with self.get_connection() as db:
+                async with self.get_connection(write=write) as db:
                     result = await operation(db, *args)
-                    await db.commit()
+                    if write:
+                        await db.commit()
                     return result
             except Exception as e:
                 if attempt == self.max_retries - 1:
@@ -220,7 +309,11 @@ class AsyncDatabaseManager:
                     metadata TEXT DEFAULT "{}",
                     screenshot TEXT DEFAULT "",
                     response_headers TEXT DEFAULT "{}",
-                    downloaded_files TEXT DEFAULT "{}"  -- New column added
+                    downloaded_files TEXT DEFAULT "{}",  -- New column added
+                    fetched_at REAL DEFAULT 0,
+                    last_access REAL DEFAULT 0,
+                    access_count INTEGER DEFAULT 0,
+                    size INTEGER DEFAULT -1
                 )
             """
             )
@@ -246,6 +339,18 @@ class AsyncDatabaseManager:
             for column in new_columns:
                 if column not in column_names:
                     await self.aalter_db_add_column(column, db)
+
+            # Entries cached before the timestamps existed start their life now
+            if "fetched_at" not in column_names:
+                for column in _STATS_COLUMNS:
+                    await self.aalter_db_add_column(column, db)
+                now = time.time()
+                await db.execute(
+                    "UPDATE crawled_data SET fetched_at = ?, last_access = ?", (now, now)
+                )
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_crawled_data_last_access ON crawled_data (last_access)"
+            )
             await db.commit()
 
     async def aalter_db_add_column(self, new_column: str, db):
@@ -254,6 +359,10 @@ class AsyncDatabaseManager:
             await db.execute(
                 f'ALTER TABLE crawled_data ADD COLUMN {new_column} TEXT DEFAULT "{{}}"'
             )
+        elif new_column in _STATS_COLUMNS:
+            await db.execute(
+                f'ALTER TABLE crawled_data ADD COLUMN {new_column} {_STATS_COLUMNS[new_column]}'
+            )
         else:
             await db.execute(
                 f'ALTER TABLE crawled_data ADD COLUMN {new_column} TEXT DEFAULT ""'
@@ -264,64 +373,74 @@ class AsyncDatabaseManager:
             params={"column": new_column},
         )
 
-    async def aget_cached_url(self, url: str) -> Optional[CrawlResult]:
-        """Retrieve cached URL data as CrawlResult"""
+    async def aget_cached_url(
+        self, url: str, fields: Optional[Iterable[str]] = None
+    ) -> Optional[CrawlResult]:
+        """
+        Retrieve cached URL data as CrawlResult.
+
+        fields is a projection: only those columns are read (and their content loaded from the blob
+        store), the others keep their CrawlResult defaults. url and success are always read.
+        None reads everything.
+
+        A read field whose stored content is gone from the blob store (deleted by acompact, or by
+        hand) makes the entry a miss, the caller crawls the page again instead of getting it empty.
+        """
+        if fields is None:
+            columns = "*"
+        else:
+            columns = ", ".join(
+                ["url", "success"] + [f for f in _CACHED_COLUMNS if f in set(fields)]
+            )
 
         async def _get(db):
             async with db.execute(
-                "SELECT * FROM crawled_data WHERE url = ?", (url,)
+                f"SELECT {columns} FROM crawled_data WHERE url = ?", (url,)
             ) as cursor:
                 row = await cursor.fetchone()
                 if not row:
                     return None
 
                 # Get column names
-                columns = [description[0] for description in cursor.description]
+                columns_read = [description[0] for description in cursor.description]
                 # Create dict from row data
-                row_dict = dict(zip(columns, row))
-
-                # Load content from files using stored hashes
-                content_fields = {
-                    "html": row_dict["html"],
-                    "cleaned_html": row_dict["cleaned_html"],
-                    "markdown": row_dict["markdown"],
-                    "extracted_content": row_dict["extracted_content"],
-                    "screenshot": row_dict["screenshot"],
-                    "screenshots": row_dict["screenshot"],
-                }
-
-                for field, hash_value in content_fields.items():
-                    if hash_value:
-                        content = await self._load_content(
-                            hash_value,
-                            field.split("_")[0],  # Get content type from field name
-                        )
-                        row_dict[field] = content or ""
-                    else:
+                row_dict = dict(zip(columns_read, row))
+
+            # Load content from files using stored hashes
+            for field, content_type in _BLOB_COLUMNS.items():
+                if field not in row_dict:
+                    continue
+                hash_value = row_dict[field]
+                if hash_value:
+                    content = await self._load_content(hash_value, content_type)
+                    if content is None:
+                        return None
+                    row_dict[field] = content
+                else:
+                    row_dict[field] = ""
+
+            # Parse JSON fields
+            json_fields = [
+                "media",
+                "links",
+                "metadata",
+                "response_headers",
+                "markdown",
+            ]
+            for field in json_fields:
+                if field not in row_dict:
+                    continue
+                try:
+                    row_dict[field] = (
+                        json.loads(row_dict[field]) if row_dict[field] else {}
+                    )
+                except json.JSONDecodeError:
+                    # Very UGLY, never mention it to me please
+                    if not (field == "markdown" and isinstance(row_dict[field], str)):
                         row_dict[field] = ""
 
-                # Parse JSON fields
-                json_fields = [
-                    "media",
-                    "links",
-                    "metadata",
-                    "response_headers",
-                    "markdown",
-                ]
-                for field in json_fields:
-                    try:
-                        row_dict[field] = (
-                            json.loads(row_dict[field]) if row_dict[field] else {}
-                        )
-                    except json.JSONDecodeError:
-                        # Very UGLY, never mention it to me please
-                        if not (field == "markdown" and isinstance(row_dict[field], str)):
-                            row_dict[field] = ""
-
-                if isinstance(row_dict["markdown"], Dict):
-                    row_dict["markdown"] = row_dict["markdown"].get("raw_markdown", "")
-
-                # Parse downloaded_files
+            # Parse downloaded_files
+            if "downloaded_files" in row_dict:
                 try:
                     row_dict["downloaded_files"] = (
                         json.loads(row_dict["downloaded_files"])
@@ -331,9 +450,11 @@ class AsyncDatabaseManager:
                 except json.JSONDecodeError:
                     row_dict["downloaded_files"] = []
 
-                # Remove any fields not in CrawlResult model
-                valid_fields = CrawlResult.__annotations__.keys()
-                filtered_dict = {k: v for k, v in row_dict.items() if k in valid_fields}
+            # Remove any fields not in CrawlResult model
+            valid_fields = CrawlResult.__annotations__.keys()
+            filtered_dict = {k: v for k, v in row_dict.items() if k in valid_fields}
+            filtered_dict.setdefault("html", "")
+            if "markdown" in row_dict:
                 if isinstance(row_dict["markdown"], str):
                     filtered_dict["markdown"] = row_dict["markdown"]
                 elif isinstance(row_dict["markdown"], dict):
@@ -341,10 +462,13 @@ class AsyncDatabaseManager:
                 else:
                     filtered_dict["markdown"] = ""
 
-                return CrawlResult(**filtered_dict)
+            return CrawlResult(**filtered_dict)
 
         try:
-            return await self.execute_with_retry(_get)
+            result = await self.execute_with_retry(_get, write=False)
+            if result is not None:
+                self._note_access(url)
+            return result
         except Exception as e:
             self.logger.error(
                 message="Error retrieving cached URL: {error}",
@@ -369,15 +493,28 @@ class AsyncDatabaseManager:
         for field, (content, content_type) in content_map.items():
             content_hashes[field] = await self._store_content(content, content_type)
 
+        json_values = (
+            json.dumps(result.media),
+            json.dumps(result.links),
+            json.dumps(result.metadata or {}),
+            json.dumps(result.response_headers or {}),
+            json.dumps(result.downloaded_files or []),
+        )
+        size = await self.blob_store.size(
+            (content_hashes[field], content_type) for field, content_type in _BLOB_COLUMNS.items()
+        ) + sum(len(value) for value in json_values)
+        now = time.time()
+
         async def _cache(db):
             await db.execute(
                 """
                 INSERT INTO crawled_data (
                     url, html, cleaned_html, markdown,
                     extracted_content, success, media, links, metadata,
-                    screenshot, response_headers, downloaded_files
+                    screenshot, response_headers, downloaded_files,
+                    fetched_at, last_access, size
                 )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ON CONFLICT(url) DO UPDATE SET
                     html = excluded.html,
                     cleaned_html = excluded.cleaned_html,
@@ -389,7 +526,10 @@ class AsyncDatabaseManager:
                     metadata = excluded.metadata,
                     screenshot = excluded.screenshot,
                     response_headers = excluded.response_headers,
-                    downloaded_files = excluded.downloaded_files
+                    downloaded_files = excluded.downloaded_files,
+                    fetched_at = excluded.fetched_at,
+                    last_access = excluded.last_access,
+                    size = excluded.size
             """,
                 (
                     result.url,
@@ -398,12 +538,15 @@ class AsyncDatabaseManager:
                     content_hashes["markdown"],
                     content_hashes["extracted_content"],
                     result.success,
-                    json.dumps(result.media),
-                    json.dumps(result.links),
-                    json.dumps(result.metadata or {}),
+                    json_values[0],
+                    json_values[1],
+                    json_values[2],
                     content_hashes["screenshot"],
-                    json.dumps(result.response_headers or {}),
-                    json.dumps(result.downloaded_files or []),
+                    json_values[3],
+                    json_values[4],
+                    now,
+                    now,
+                    size,
                 ),
             )
 
@@ -426,7 +569,7 @@ class AsyncDatabaseManager:
                 return result[0] if result else 0
 
         try:
-            return await self.execute_with_retry(_count)
+            return await self.execute_with_retry(_count, write=False)
         except Exception as e:
             self.logger.error(
                 message="Error getting total count: {error}",
@@ -460,6 +603,8 @@ class AsyncDatabaseManager:
 
         try:
             await self.execute_with_retry(_flush)
+            # The table is recreated (and verified again) on next use
+            self._initialized = False
         except Exception as e:
             self.logger.error(
                 message="Error flushing database: {error}",
@@ -468,40 +613,192 @@ class AsyncDatabaseManager:
                 params={"error": str(e)},
             )
 
-    async def _store_content(self, content: str, content_type: str) -> str:
-        """Store content in filesystem and return hash"""
-        if not content:
-            return ""
+    def _note_access(self, url: str):
+        last_access, reads = self._pending_access.get(url, (0.0, 0))
+        self._pending_access[url] = (time.time(), reads + 1)
+        if len(self._pending_access) >= 1000:
+            task = asyncio.get_running_loop().create_task(self._flush_access_stats_quietly())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_access_stats_quietly(self):
+        try:
+            await self.aflush_access_stats()
+        except Exception as e:
+            self.logger.error(
+                message="Error writing cache access stats: {error}",
+                tag="ERROR",
+                force_verbose=True,
+                params={"error": str(e)},
+            )
+
+    async def aflush_access_stats(self):
+        """Write the buffered read statistics (last_access, access_count) in one transaction"""
+        if not self._pending_access:
+            return
+        pending, self._pending_access = self._pending_access, {}
+
+        async def _flush(db):
+            await db.executemany(
+                "UPDATE crawled_data SET last_access = MAX(last_access, ?), access_count = access_count + ? WHERE url = ?",
+                [(last_access, reads, url) for url, (last_access, reads) in pending.items()],
+            )
 
-        content_hash = generate_content_hash(content)
-        file_path = os.path.join(self.content_paths[content_type], content_hash)
+        await self.execute_with_retry(_flush)
 
-        # Only write if file doesn't exist
-        if not os.path.exists(file_path):
-            async with aiofiles.open(file_path, "w", encoding="utf-8") as f:
-                await f.write(content)
+    async def _compaction_loop(self):
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                await self.acompact()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(
+                    message="Cache compaction failed: {error}",
+                    tag="ERROR",
+                    force_verbose=True,
+                    params={"error": str(e)},
+                )
+
+    async def _measure_sizes(self, limit: int = 1000):
+        """Fill in the size of entries cached before it was recorded, a batch per compaction"""
+        async def _unmeasured(db):
+            async with db.execute(
+                "SELECT url, html, cleaned_html, markdown, extracted_content, screenshot, "
+                "LENGTH(media) + LENGTH(links) + LENGTH(metadata) + LENGTH(response_headers) + LENGTH(downloaded_files) "
+                "FROM crawled_data WHERE size < 0 LIMIT ?",
+                (limit,),
+            ) as cursor:
+                return await cursor.fetchall()
+
+        rows = await self.execute_with_retry(_unmeasured, write=False)
+        sizes = []
+        for row in rows:
+            blobs = zip(row[1:6], _BLOB_COLUMNS.values())
+            sizes.append((await self.blob_store.size(blobs) + (row[6] or 0), row[0]))
+
+        async def _update(db):
+            await db.executemany("UPDATE crawled_data SET size = ? WHERE url = ?", sizes)
+
+        if sizes:
+            await self.execute_with_retry(_update)
+
+    async def acompact(self) -> Dict[str, int]:
+        """
+        Apply the max_age and max_bytes policies and collect orphaned content blobs.
+
+        How it works:
+        1. Write the buffered read statistics and measure entries of unknown size.
+        2. Delete entries not read or written for max_age seconds.
+        3. While the total size is over max_bytes, delete the least recently used entries,
+           down to 90% of it so the next writes do not trigger another round at once.
+        4. Check the blobs of deleted entries, plus every blob under 16 of the 256 hash prefixes
+           (a different 16 each time), against the table and delete the unreferenced ones older
+           than gc_grace. The check holds the writer, so no entry can start referencing a blob
+           in between.
+
+        Returns:
+            Dict[str, int]: evicted entries, deleted blobs and bytes freed.
+        """
+        await self.aflush_access_stats()
+        await self._measure_sizes()
+        now = time.time()
+        evicted: Dict[str, Set[str]] = {content_type: set() for content_type in _BLOB_COLUMNS.values()}
+        blob_columns = ", ".join(_BLOB_COLUMNS)
+
+        async def _evict(db, where: str, params: tuple) -> int:
+            async with db.execute(
+                f"SELECT {blob_columns} FROM crawled_data WHERE {where}", params
+            ) as cursor:
+                for row in await cursor.fetchall():
+                    for content_hash, content_type in zip(row, _BLOB_COLUMNS.values()):
+                        if content_hash:
+                            evicted[content_type].add(content_hash)
+            cursor = await db.execute(f"DELETE FROM crawled_data WHERE {where}", params)
+            return cursor.rowcount
+
+        stats = {"evicted": 0, "blobs_deleted": 0, "bytes_freed": 0}
+        if self.max_age > 0:
+            stats["evicted"] += await self.execute_with_retry(
+                _evict, "last_access < ?", (now - self.max_age,)
+            )
 
-        return content_hash
+        if self.max_bytes > 0:
+            async def _total(db):
+                async with db.execute(
+                    "SELECT COALESCE(SUM(MAX(size, 0)), 0) FROM crawled_data"
+                ) as cursor:
+                    return (await cursor.fetchone())[0]
+
+            excess = await self.execute_with_retry(_total, write=False) - int(self.max_bytes * 0.9)
+            if excess > int(self.max_bytes * 0.1):
+                # Oldest entries whose sizes add up to the excess, found with a running sum
+                async def _cutoff(db):
+                    async with db.execute(
+                        "SELECT last_access FROM (SELECT last_access, SUM(MAX(size, 0)) OVER "
+                        "(ORDER BY last_access, url) AS freed FROM crawled_data) WHERE freed >= ? LIMIT 1",
+                        (excess,),
+                    ) as cursor:
+                        row = await cursor.fetchone()
+                        return row[0] if row else None
+
+                cutoff = await self.execute_with_retry(_cutoff, write=False)
+                if cutoff is not None:
+                    stats["evicted"] += await self.execute_with_retry(
+                        _evict, "last_access <= ?", (cutoff,)
+                    )
+
+        # Orphan sweep: candidates are the evicted blobs plus this round's prefixes
+        prefixes = {f"{i:02x}" for i in range(self._gc_round * 16, self._gc_round * 16 + 16)}
+        self._gc_round = (self._gc_round + 1) % 16
+        candidates = {}
+        for content_type, hashes in evicted.items():
+            candidates[content_type] = hashes | await self.blob_store.list_blobs(content_type, prefixes)
+
+        async def _collect(db):
+            # Drop every candidate still referenced, in a single table scan
+            async with db.execute(f"SELECT {blob_columns} FROM crawled_data") as cursor:
+                async for row in cursor:
+                    for content_hash, content_type in zip(row, _BLOB_COLUMNS.values()):
+                        candidates[content_type].discard(content_hash)
+            for content_type, orphans in candidates.items():
+                if orphans:
+                    deleted, freed = await self.blob_store.delete(orphans, content_type, now - self.gc_grace)
+                    stats["blobs_deleted"] += deleted
+                    stats["bytes_freed"] += freed
+
+        await self.execute_with_retry(_collect)
+        self.logger.info(
+            message="Cache compacted: {evicted} entries evicted, {blobs} orphan blobs deleted, {freed} bytes freed",
+            tag="CACHING",
+            params={"evicted": stats["evicted"], "blobs": stats["blobs_deleted"], "freed": stats["bytes_freed"]},
+        )
+        return stats
+
+    async def _store_content(self, content: str, content_type: str) -> str:
+        """Store content in the blob store and return hash"""
+        return await self.blob_store.put(content, content_type)
 
     async def _load_content(
         self, content_hash: str, content_type: str
     ) -> Optional[str]:
-        """Load content from filesystem by hash"""
+        """Load content from the blob store by hash"""
         if not content_hash:
             return None
 
-        file_path = os.path.join(self.content_paths[content_type], content_hash)
         try:
-            async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
-                return await f.read()
-        except:
+            content = await self.blob_store.get(content_hash, content_type)
+        except Exception:
+            content = None
+        if content is None:
             self.logger.error(
-                message="Failed to load content: {file_path}",
+                message="Failed to load content: {content_type}/{content_hash}",
                 tag="ERROR",
                 force_verbose=True,
-                params={"file_path": file_path},
+                params={"content_type": content_type, "content_hash": content_hash},
             )
-            return None
+        return content
 
 
 # Create a singleton instance
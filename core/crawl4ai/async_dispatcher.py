@@ -0,0 +1,123 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .models import DomainState
+
+
+class RateLimiter:
+    """
+    Per-domain politeness for the fetch path.
+
+    Every domain gets a concurrency cap and a minimum delay between two requests. When a domain answers
+    with one of the rate limit codes (429/503 by default), its delay grows exponentially up to max_delay
+    and shrinks back once requests succeed again.
+
+    One instance is meant to be shared by every crawler of the process, so the limits hold across
+    browsers and tasks.
+
+    Attributes:
+        base_delay (Tuple[float, float]): Range the delay between two requests to a domain is drawn from.
+        max_delay (float): Upper bound of the backoff delay in seconds.
+        max_retries (int): Number of times a rate limited request is retried before giving up.
+        rate_limit_codes (List[int]): Status codes treated as "slow down".
+        max_concurrent_per_domain (int): Requests allowed in flight to the same domain.
+        domains (Dict[str, DomainState]): Backoff state per domain.
+    """
+
+    def __init__(
+        self,
+        base_delay: Tuple[float, float] = (1.0, 2.0),
+        max_delay: float = 60.0,
+        max_retries: int = 3,
+        rate_limit_codes: Optional[List[int]] = None,
+        max_concurrent_per_domain: int = 2,
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.rate_limit_codes = rate_limit_codes or [429, 503]
+        self.max_concurrent_per_domain = max(max_concurrent_per_domain, 1)
+        self.domains: Dict[str, DomainState] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def get_domain(self, url: str) -> str:
+        return urlparse(url).netloc
+
+    def _state(self, domain: str) -> DomainState:
+        state = self.domains.get(domain)
+        if not state:
+            state = self.domains[domain] = DomainState()
+        return state
+
+    def _semaphore(self, domain: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(domain)
+        if not semaphore:
+            semaphore = self._semaphores[domain] = asyncio.Semaphore(
+                self.max_concurrent_per_domain
+            )
+        return semaphore
+
+    def is_ready(self, domain: str) -> bool:
+        """True if a request to the domain could start right now without waiting."""
+        semaphore = self._semaphores.get(domain)
+        if semaphore and semaphore.locked():
+            return False
+        state = self.domains.get(domain)
+        if not state or not state.last_request_time:
+            return True
+        return time.time() >= state.last_request_time + state.current_delay
+
+    async def wait_if_needed(self, url: str):
+        """
+        Sleep until the domain's delay has passed since its previous request.
+
+        The slot is reserved before sleeping, so concurrent callers for the same domain queue up
+        one delay apart instead of all waking at the same moment.
+        """
+        state = self._state(self.get_domain(url))
+        if state.current_delay == 0:
+            state.current_delay = random.uniform(*self.base_delay)
+
+        now = time.time()
+        start_at = now
+        if state.last_request_time:
+            start_at = max(now, state.last_request_time + state.current_delay)
+        state.last_request_time = start_at
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    def update_delay(self, url: str, status_code: Optional[int]) -> bool:
+        """
+        Adjust the domain's delay from a response status.
+
+        Returns:
+            bool: False if the domain keeps rate limiting beyond max_retries, True otherwise.
+        """
+        state = self._state(self.get_domain(url))
+        if status_code in self.rate_limit_codes:
+            state.fail_count += 1
+            if state.fail_count > self.max_retries:
+                # Give up on this request only, the next one gets its retries again (the delay stays backed off)
+                state.fail_count = 0
+                return False
+            state.current_delay = min(
+                max(state.current_delay, self.base_delay[0]) * 2 * random.uniform(0.75, 1.25),
+                self.max_delay,
+            )
+        else:
+            state.current_delay = max(
+                random.uniform(*self.base_delay), state.current_delay * 0.75
+            )
+            state.fail_count = 0
+        return True
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Hold one of the domain's concurrent slots, honoring its delay before entering."""
+        async with self._semaphore(self.get_domain(url)):
+            await self.wait_if_needed(url)
+            yield
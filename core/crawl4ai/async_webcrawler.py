@@ -4,20 +4,22 @@ import sys
 import time
 import psutil
 from colorama import Fore
-from typing import Optional
+from typing import Optional, Iterable
 import asyncio
 
 # from contextlib import nullcontext, asynccontextmanager
 from contextlib import asynccontextmanager
+import httpx
 from .models import CrawlResult, MarkdownGenerationResult
 from .async_database import async_db_manager
+from .async_dispatcher import RateLimiter
 
 from .async_crawler_strategy import (
     AsyncCrawlerStrategy,
     AsyncPlaywrightCrawlerStrategy,
     AsyncCrawlResponse,
 )
-from .cache_context import CacheContext
+from .cache_context import CacheContext, CacheMode
 from .markdown_generation_strategy import (
     DefaultMarkdownGenerator,
     MarkdownGenerationStrategy,
@@ -102,8 +104,6 @@ class AsyncWebCrawler:
             print(result.markdown)
     """
 
-    _domain_last_hit = {}
-
     def __init__(
         self,
         crawler_strategy: Optional[AsyncCrawlerStrategy] = None,
@@ -111,6 +111,8 @@ class AsyncWebCrawler:
         base_directory: str = os.getenv("PROJECT_DIR", ''),
         thread_safe: bool = False,
         memory_threshold_percent: float = 90.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        page_budget: Optional[asyncio.Semaphore] = None,
         **kwargs,
     ):
         """
@@ -123,10 +125,17 @@ class AsyncWebCrawler:
             always_by_pass_cache: Deprecated, use always_bypass_cache instead
             base_directory: Base directory for storing cache
             thread_safe: Whether to use thread-safe operations
+            rate_limiter: Per-domain politeness applied to every fetch, share one instance between crawlers
+                          so the limits hold process-wide. If None, fetches are not throttled
+            page_budget: Bounds the browser fetches in flight, share one instance between crawlers to bound
+                         them process-wide. Only held during a fetch, never while waiting for a domain's
+                         delay or backoff. If None, fetches are not bounded
             **kwargs: Additional arguments for backwards compatibility
         """
 
         self.memory_threshold_percent = memory_threshold_percent
+        self.rate_limiter = rate_limiter
+        self.page_budget = page_budget
         self.browser_config = config or BrowserConfig()
         # Initialize logger first since other components may need it
         self.logger = AsyncLogger(
@@ -158,6 +167,9 @@ class AsyncWebCrawler:
         # Initialize robots parser
         self.robots_parser = RobotsParser()
 
+        # Plain HTTP client for cache revalidation, created on first use
+        self._http_client: Optional[httpx.AsyncClient] = None
+
         self.ready = False
 
     async def start(self):
@@ -187,6 +199,9 @@ class AsyncWebCrawler:
         2. Close any open pages and contexts
         """
         await self.crawler_strategy.__aexit__(None, None, None)
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
     async def __aenter__(self):
         return await self.start()
@@ -215,10 +230,23 @@ class AsyncWebCrawler:
         self,
         url: str,
         config: CrawlerRunConfig = None,
+        fields: Optional[Iterable[str]] = None,
         **kwargs,
     ) -> CrawlResult:
+        """
+        Crawl url, or serve it from the cache when the config's cache mode allows.
+
+        fields limits what a cache hit loads (see AsyncDatabaseManager.aget_cached_url), the other
+        CrawlResult fields keep their defaults. Fresh crawls always return every field.
+        """
 
         crawler_config = config or CrawlerRunConfig()
+        if fields is not None:
+            fields = set(fields)
+            if crawler_config.screenshot:
+                fields.add("screenshot")
+            if crawler_config.cache_mode == CacheMode.REVALIDATE:
+                fields.add("response_headers")
         if not isinstance(url, str) or not url:
             self.logger.error("Invalid URL, make sure the URL is a non-empty string")
             return CrawlResult(url=url, html="", success=False, error_message="Invalid URL, make sure the URL is a non-empty string")
@@ -248,10 +276,17 @@ class AsyncWebCrawler:
 
                 # Try to get cached result if appropriate
                 if cache_context.should_read():
-                    cached_result = await async_db_manager.aget_cached_url(url)
+                    cached_result = await async_db_manager.aget_cached_url(url, fields=fields)
+
+                # A changed (or unverifiable) page is crawled again and replaces the cached one
+                if cached_result and cache_context.should_revalidate():
+                    if not await self._revalidate(url, cached_result.response_headers):
+                        cached_result = None
 
                 if cached_result:
                     html = sanitize_input_encode(cached_result.html)
+                    # Without html in the projection, the stored success flag tells whether the page had content
+                    has_html = bool(html) if fields is None or "html" in fields else cached_result.success
                     extracted_content = sanitize_input_encode(
                         cached_result.extracted_content or ""
                     )
@@ -272,13 +307,13 @@ class AsyncWebCrawler:
 
                     self.logger.url_status(
                         url=cache_context.display_url,
-                        success=bool(html),
+                        success=has_html,
                         timing=time.perf_counter() - start_time,
                         tag="CACHING",
                     )
 
                 # Fetch fresh content if needed
-                if not cached_result or not html:
+                if not cached_result or not has_html:
                     t1 = time.perf_counter()
 
                     if crawler_config.user_agent:
@@ -299,10 +334,7 @@ class AsyncWebCrawler:
                     ##############################
                     # Call CrawlerStrategy.crawl #
                     ##############################
-                    async_response = await self.crawler_strategy.crawl(
-                        url,
-                        config=crawler_config,  # Pass the entire config object
-                    )
+                    async_response = await self._polite_crawl(url, crawler_config)
 
                     html = sanitize_input_encode(async_response.html)
                     screenshot_data = async_response.screenshot
@@ -376,7 +408,7 @@ class AsyncWebCrawler:
                         colors={"status": Fore.GREEN, "timing": Fore.YELLOW},
                     )
 
-                    cached_result.success = bool(html)
+                    cached_result.success = has_html
                     cached_result.session_id = getattr(config, "session_id", None)
                     cached_result.redirected_url = cached_result.redirected_url or url
                     return cached_result
@@ -401,6 +433,76 @@ class AsyncWebCrawler:
                     url=url, html="", success=False, error_message=error_message
                 )
 
+    async def _revalidate(self, url: str, response_headers: Optional[dict]) -> bool:
+        """
+        Ask the server whether a cached page is still current, with a conditional GET carrying the
+        validators (ETag / Last-Modified) stored with it.
+
+        Returns True only on 304 Not Modified. No validators, any other status or a network error
+        mean the page has to be crawled again. The body of a changed page is not downloaded here,
+        the browser fetches it.
+        """
+        headers = {k.lower(): v for k, v in (response_headers or {}).items()}
+        conditional = {}
+        if headers.get("etag"):
+            conditional["If-None-Match"] = headers["etag"]
+        if headers.get("last-modified"):
+            conditional["If-Modified-Since"] = headers["last-modified"]
+        if not conditional:
+            return False
+        conditional["User-Agent"] = self.browser_config.user_agent
+
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=15, follow_redirects=True)
+        try:
+            async with self.rate_limiter.slot(url) if self.rate_limiter else self.nullcontext():
+                async with self._http_client.stream("GET", url, headers=conditional) as response:
+                    status_code = response.status_code
+        except httpx.HTTPError:
+            return False
+        if self.rate_limiter:
+            self.rate_limiter.update_delay(url, status_code)
+        self.logger.debug(
+            message="{url:.50}... | Revalidated: {status}",
+            tag="CACHING",
+            params={"url": url, "status": status_code},
+        )
+        return status_code == 304
+
+    async def _polite_crawl(self, url: str, config: CrawlerRunConfig) -> AsyncCrawlResponse:
+        """
+        Call the crawler strategy under the rate limiter's per-domain cap and delay.
+
+        Responses with a rate limit status are retried after the domain's backoff,
+        up to rate_limiter.max_retries times. The page budget is taken once the domain slot
+        is granted and given back before the next wait, so a throttled domain never holds pages
+        other domains could use.
+        """
+        if not self.rate_limiter or not url.startswith(("http://", "https://")):
+            async with self.page_budget or self.nullcontext():
+                return await self.crawler_strategy.crawl(url, config=config)
+
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            async with self.rate_limiter.slot(url):
+                async with self.page_budget or self.nullcontext():
+                    async_response = await self.crawler_strategy.crawl(url, config=config)
+            status_code = async_response.status_code
+            if not self.rate_limiter.update_delay(url, status_code):
+                break
+            if status_code not in self.rate_limiter.rate_limit_codes:
+                break
+            self.logger.warning(
+                message="{url:.50}... | Status: {status} | rate limited, retry {attempt}/{retries}",
+                tag="FETCH",
+                params={
+                    "url": url,
+                    "status": status_code,
+                    "attempt": attempt + 1,
+                    "retries": self.rate_limiter.max_retries,
+                },
+            )
+        return async_response
+
     async def aprocess_html(
         self,
         url: str,
@@ -0,0 +1,344 @@
+import os
+import glob
+import mmap
+import itertools
+import zlib
+import time
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .utils import ensure_content_dirs, generate_content_hash
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage for the large fields of cached pages (html, cleaned html, markdown,
+    extracted content, screenshots). Blobs are keyed by the xxhash of their text, which is what
+    the crawled_data table stores.
+    """
+
+    @abstractmethod
+    async def put(self, content: str, content_type: str) -> str:
+        """Store content and return its hash, empty content is not stored"""
+        pass
+
+    @abstractmethod
+    async def get(self, content_hash: str, content_type: str) -> Optional[str]:
+        """Content stored under the hash, None when missing"""
+        pass
+
+    @abstractmethod
+    async def size(self, blobs: Iterable[Tuple[str, str]]) -> int:
+        """Bytes used on disk by the (content_hash, content_type) blobs, missing ones count 0"""
+        pass
+
+    @abstractmethod
+    async def list_blobs(self, content_type: str, prefixes: Iterable[str]) -> Set[str]:
+        """Hashes of the stored blobs of content_type starting with one of the 2 hex chars prefixes"""
+        pass
+
+    @abstractmethod
+    async def delete(self, hashes: Iterable[str], content_type: str, older_than: float) -> Tuple[int, int]:
+        """
+        Delete the blobs last written before older_than (a timestamp), return (blobs deleted, bytes freed).
+        Storing content that already exists refreshes its write time, so a blob just reused by a
+        new cache entry is never deleted under it.
+        """
+        pass
+
+
+class FileBlobStore(BlobStore):
+    """One uncompressed file per blob, flat directory per content type (the original layout)."""
+
+    def __init__(self, base_path: str):
+        self.content_paths = ensure_content_dirs(base_path)
+
+    def _path(self, content_hash: str, content_type: str) -> str:
+        return os.path.join(self.content_paths[content_type], content_hash)
+
+    def _paths(self, content_hash: str, content_type: str) -> List[str]:
+        # Every place a blob may live, newest layout first
+        return [self._path(content_hash, content_type)]
+
+    def _write(self, path: str, content: str, content_type: str):
+        # Only write if file doesn't exist, an existing one is marked as just written (see delete)
+        try:
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            pass
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def _read(self, path: str) -> Optional[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    async def put(self, content: str, content_type: str) -> str:
+        if not content:
+            return ""
+        content_hash = generate_content_hash(content)
+        await asyncio.to_thread(self._write, self._path(content_hash, content_type), content, content_type)
+        return content_hash
+
+    async def get(self, content_hash: str, content_type: str) -> Optional[str]:
+        if not content_hash:
+            return None
+        return await asyncio.to_thread(self._read, self._path(content_hash, content_type))
+
+    def _size(self, blobs: Iterable[Tuple[str, str]]) -> int:
+        total = 0
+        for content_hash, content_type in blobs:
+            if not content_hash:
+                continue
+            for path in self._paths(content_hash, content_type):
+                try:
+                    total += os.path.getsize(path)
+                    break
+                except OSError:
+                    continue
+        return total
+
+    async def size(self, blobs: Iterable[Tuple[str, str]]) -> int:
+        return await asyncio.to_thread(self._size, list(blobs))
+
+    def _list_blobs(self, content_type: str, prefixes: Set[str]) -> Set[str]:
+        hashes = set()
+        with os.scandir(self.content_paths[content_type]) as entries:
+            for entry in entries:
+                if entry.name[:2] in prefixes and entry.is_file() and not entry.name.endswith(".tmp"):
+                    hashes.add(entry.name)
+        return hashes
+
+    async def list_blobs(self, content_type: str, prefixes: Iterable[str]) -> Set[str]:
+        return await asyncio.to_thread(self._list_blobs, content_type, set(prefixes))
+
+    def _delete(self, hashes: List[str], content_type: str, older_than: float) -> Tuple[int, int]:
+        deleted = freed = 0
+        for content_hash in hashes:
+            for path in self._paths(content_hash, content_type):
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime < older_than:
+                        os.remove(path)
+                        deleted += 1
+                        freed += stat.st_size
+                except OSError:
+                    continue
+        return deleted, freed
+
+    async def delete(self, hashes: Iterable[str], content_type: str, older_than: float) -> Tuple[int, int]:
+        return await asyncio.to_thread(self._delete, list(hashes), content_type, older_than)
+
+
+class CompressedBlobStore(FileBlobStore):
+    """
+    Compressed blobs in a sharded layout: {content dir}/{hash[:2]}/{hash[2:4]}/{hash}, so no directory
+    grows past a few thousand entries.
+
+    - Blobs are zstd frames (`zstandard` is in requirements.txt), zlib streams when it is missing. The
+      codec is read from the frame itself, so blobs written with either stay readable.
+    - Once `train_after` blobs of a type in `dict_types` exist (html by default), a zstd dictionary
+      is trained from a sample of them and used for the following writes of that type. Pages of the
+      same sites share most of their markup, so this shrinks small html blobs a lot. Frames record
+      their dictionary id, and every dictionary is kept so old blobs still decode. Blobs stored by
+      earlier runs count, and the saved dictionary marks the type as trained across restarts.
+    - Blobs of at least `mmap_threshold` bytes are read through mmap, without an intermediate copy.
+    - Files of the original flat layout are still read when a hash is not found in the new one.
+    """
+
+    def __init__(
+        self,
+        base_path: str,
+        level: int = 3,
+        dict_types: tuple = ("html",),
+        train_after: int = 1000,
+        dict_size: int = 112640,
+        mmap_threshold: int = 64 * 1024,
+    ):
+        super().__init__(base_path)
+        self.level = level
+        self.dict_types = dict_types
+        self.train_after = train_after
+        self.dict_size = dict_size
+        self.mmap_threshold = mmap_threshold
+        self.dict_path = os.path.join(base_path, "blob_dicts")
+        os.makedirs(self.dict_path, exist_ok=True)
+        # dict id -> dictionary, and the newest dictionary per content type
+        self._dicts: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self._type_dicts: Dict[str, "zstandard.ZstdCompressionDict"] = {}
+        self._writes: Dict[str, int] = {}
+        self._training = threading.Lock()
+        self._training_types: Set[str] = set()
+        if zstandard is not None:
+            self._load_dicts()
+            # A restart does not start counting over, stored blobs count towards train_after
+            for content_type in self.dict_types:
+                if content_type not in self._type_dicts:
+                    self._writes[content_type] = self._count_blobs(content_type, self.train_after)
+
+    def _load_dicts(self):
+        # file name: {content_type}.{trained at}.zdict, the newest one of a type compresses new blobs
+        paths = glob.glob(os.path.join(self.dict_path, "*.zdict"))
+        for path in sorted(paths, key=lambda p: int(os.path.basename(p).rsplit(".", 2)[1])):
+            content_type = os.path.basename(path).rsplit(".", 2)[0]
+            with open(path, "rb") as f:
+                zdict = zstandard.ZstdCompressionDict(f.read())
+            zdict.precompute_compress(level=self.level)
+            self._dicts[zdict.dict_id()] = zdict
+            self._type_dicts[content_type] = zdict
+
+    def _path(self, content_hash: str, content_type: str) -> str:
+        return os.path.join(
+            self.content_paths[content_type], content_hash[:2], content_hash[2:4], content_hash
+        )
+
+    def _sharded_blobs(self, content_type: str) -> Iterable[str]:
+        pattern = os.path.join(self.content_paths[content_type], "??", "??", "*")
+        return (path for path in glob.iglob(pattern) if not path.endswith(".tmp"))
+
+    def _count_blobs(self, content_type: str, limit: int) -> int:
+        # Stops at limit, the cost does not grow with the cache
+        return sum(1 for _ in itertools.islice(self._sharded_blobs(content_type), limit))
+
+    def _paths(self, content_hash: str, content_type: str) -> List[str]:
+        return [
+            self._path(content_hash, content_type),
+            os.path.join(self.content_paths[content_type], content_hash),
+        ]
+
+    def _list_blobs(self, content_type: str, prefixes: Set[str]) -> Set[str]:
+        # Flat legacy files, then the shards of the prefixes
+        hashes = super()._list_blobs(content_type, prefixes)
+        for prefix in prefixes:
+            for path in glob.iglob(os.path.join(self.content_paths[content_type], prefix, "??", "*")):
+                if not path.endswith(".tmp"):
+                    hashes.add(os.path.basename(path))
+        return hashes
+
+    def _compress(self, data: bytes, content_type: str) -> bytes:
+        if zstandard is None:
+            return zlib.compress(data, 6)
+        # Compressor objects are not thread safe and writes run in worker threads, so one per call
+        return zstandard.ZstdCompressor(level=self.level, dict_data=self._type_dicts.get(content_type)).compress(data)
+
+    def _decompress(self, data) -> bytes:
+        if bytes(data[:4]) != ZSTD_MAGIC:
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise RuntimeError("blob is zstd compressed, install zstandard to read it")
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        return zstandard.ZstdDecompressor(dict_data=self._dicts.get(dict_id)).decompress(data)
+
+    def _write(self, path: str, content: str, content_type: str):
+        try:
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            pass
+        data = self._compress(content.encode("utf-8"), content_type)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, a reader never sees a half written blob
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read(self, path: str) -> Optional[str]:
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size >= self.mmap_threshold:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        return self._decompress(data).decode("utf-8")
+                return self._decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    async def put(self, content: str, content_type: str) -> str:
+        content_hash = await super().put(content, content_type)
+        if content_hash:
+            self._writes[content_type] = self._writes.get(content_type, 0) + 1
+            if self._should_train(content_type):
+                self._training_types.add(content_type)
+                asyncio.get_running_loop().run_in_executor(None, self._train, content_type)
+        return content_hash
+
+    async def get(self, content_hash: str, content_type: str) -> Optional[str]:
+        if not content_hash:
+            return None
+        content = await super().get(content_hash, content_type)
+        if content is None:
+            # Written by the original flat layout
+            content = await asyncio.to_thread(
+                FileBlobStore._read, self, os.path.join(self.content_paths[content_type], content_hash)
+            )
+        return content
+
+    def _should_train(self, content_type: str) -> bool:
+        return (
+            zstandard is not None
+            and content_type in self.dict_types
+            and content_type not in self._type_dicts
+            and content_type not in self._training_types
+            and self._writes[content_type] >= self.train_after
+        )
+
+    def _train(self, content_type: str):
+        try:
+            self.train_dictionary(content_type)
+        finally:
+            if content_type not in self._type_dicts:
+                # Too few usable samples (or training failed), try again after train_after more writes
+                self._writes[content_type] = 0
+            self._training_types.discard(content_type)
+
+    def train_dictionary(self, content_type: str, max_samples: int = 2000):
+        """Train a zstd dictionary from stored blobs of content_type and use it for new writes"""
+        if zstandard is None or not self._training.acquire(blocking=False):
+            return
+        try:
+            samples = []
+            for path in self._sharded_blobs(content_type):
+                content = self._read(path)
+                if content:
+                    samples.append(content.encode("utf-8"))
+                if len(samples) >= max_samples:
+                    break
+            if len(samples) < 10:
+                return
+            zdict = zstandard.train_dictionary(self.dict_size, samples, level=self.level)
+            with open(os.path.join(self.dict_path, f"{content_type}.{time.time_ns()}.zdict"), "wb") as f:
+                f.write(zdict.as_bytes())
+            zdict.precompute_compress(level=self.level)
+            # Readable before it is used for writing
+            self._dicts[zdict.dict_id()] = zdict
+            self._type_dicts[content_type] = zdict
+        finally:
+            self._training.release()
+
+
+blob_stores = {
+    "files": FileBlobStore,
+    "compressed": CompressedBlobStore,
+}
+
+
+def create_blob_store(base_path: str, kind: str = "") -> BlobStore:
+    """Blob store named by kind, or by CACHE_BLOB_STORE ("compressed" by default)"""
+    kind = kind or os.getenv("CACHE_BLOB_STORE", "compressed")
+    if kind not in blob_stores:
+        raise ValueError(f"Unknown blob store {kind}, choose from {list(blob_stores)}")
+    return blob_stores[kind](base_path)
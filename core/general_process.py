@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*-
-from utils.pb_api import PbTalker
+from utils.pb_api import PbTalker, AsyncPbTalker
 from utils.general_utils import get_logger, extract_and_convert_dates, is_chinese, isURL
 from agents.get_info import *
-import json
+import asyncio
 from scrapers import *
 from utils.jina_search import search_with_jina
+from utils.crawler_pool import CrawlerPool
+from utils.url_frontier import UrlFrontier
+from utils.url_classifier import classify_urls
+from utils.seen_urls import SeenUrlIndex
+from utils.info_writer import InfoWriter
+from utils.rss_fetcher import RssFetcher
+from utils.sitemap_reader import SitemapReader
 from urllib.parse import urlparse
-from crawl4ai import AsyncWebCrawler, CacheMode
+from crawl4ai import CacheMode, RateLimiter
 from datetime import datetime
-import feedparser
 
 
 project_dir = os.environ.get("PROJECT_DIR", "")
@@ -17,11 +23,40 @@ if project_dir:
 
 wiseflow_logger = get_logger('wiseflow', project_dir)
 pb = PbTalker(wiseflow_logger)
+# used inside the crawl loop, so pocketbase round-trips do not block other crawls and llm calls
+apb = AsyncPbTalker(wiseflow_logger)
+# urls that already produced infos, per focus, kept on disk and updated as infos are saved
+seen_urls = SeenUrlIndex()
+# infos are saved in batches, the ones pocketbase refuses go to a journal that is replayed on next start
+info_writer = InfoWriter(apb, wiseflow_logger, os.path.join(project_dir, 'infos_journal.jsonl'),
+                         on_saved=lambda info: seen_urls.add(info['tag'], [info['url']]))
+# feeds are fetched concurrently with conditional requests, only entries new since the last run come out
+rss_fetcher = RssFetcher(wiseflow_logger)
+# sitemap sites hand their new article urls straight to the frontier, no listing page crawl and no get_link llm calls
+sitemap_reader = SitemapReader(wiseflow_logger,
+                               max_age=float(os.environ.get("SITEMAP_MAX_AGE", 3 * 24 * 3600)),
+                               max_urls=int(os.environ.get("SITEMAP_MAX_URLS", 500)))
 
 model = os.environ.get("PRIMARY_MODEL", "")
 if not model:
     raise ValueError("PRIMARY_MODEL not set, please set it in environment variables or edit core/.env")
 secondary_model = os.environ.get("SECONDARY_MODEL", model)
+# number of urls crawled and processed at the same time within one focus
+crawl_concurrent_number = int(os.environ.get("CRAWL_CONCURRENT_NUMBER", 4))
+
+# browsers are shared by all focuses (and the wechat listener) of this process and kept alive across loops
+# politeness per host: concurrent requests cap and min delay between two requests (backs off on 429/503)
+domain_min_delay = float(os.environ.get("DOMAIN_MIN_DELAY", 1.0))
+rate_limiter = RateLimiter(base_delay=(domain_min_delay, domain_min_delay * 2),
+                           max_concurrent_per_domain=int(os.environ.get("DOMAIN_CONCURRENT_NUMBER", 2)))
+crawler_pool = CrawlerPool(browser_cfg,
+                           wiseflow_logger,
+                           size=int(os.environ.get("BROWSER_POOL_SIZE", 1)),
+                           page_budget=int(os.environ.get("BROWSER_PAGE_BUDGET", 6)),
+                           rate_limiter=rate_limiter)
+# what process_url reads from a crawl result, cache hits load nothing else (custom scrapers also parse the html)
+crawl_fields = ('markdown', 'media', 'metadata')
+scraper_crawl_fields = crawl_fields + ('html', 'cleaned_html')
 
 
 async def info_process(url: str, 
@@ -41,21 +76,20 @@ async def info_process(url: str,
         info['url'] = url
         info['url_title'] = url_title
         info['tag'] = focus_id
-        _ = pb.add(collection_name='infos', body=info)
-        if not _:
-            wiseflow_logger.error('add info failed, writing to cache_file')
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            with open(os.path.join(project_dir, f'{timestamp}_cache_infos.json'), 'w', encoding='utf-8') as f:
-                json.dump(info, f, ensure_ascii=False, indent=4)
+        info_writer.put(info)
 
 
 async def main_process(focus: dict, sites: list):
     wiseflow_logger.debug('new task initializing...')
+    info_writer.start()
     focus_id = focus["id"]
     focus_point = focus["focuspoint"].strip()
     explanation = focus["explanation"].strip() if focus["explanation"] else ''
     wiseflow_logger.debug(f'focus_id: {focus_id}, focus_point: {focus_point}, explanation: {explanation}, search_engine: {focus["search_engine"]}')
-    existing_urls = {url['url'] for url in pb.read(collection_name='infos', fields=['url'], filter=f"tag='{focus_id}'")}
+    if seen_urls.needs_bootstrap(focus_id):
+        wiseflow_logger.debug(f'building seen url index for focus {focus_id} from pb')
+        seen_urls.bootstrap(focus_id, {url['url'] for url in await apb.read(collection_name='infos', fields=['url'], filter=f"tag='{focus_id}'")})
+    existing_urls = seen_urls.view(focus_id)
     sites_urls = {site['url'] for site in sites}
     focus_statement = f"{focus_point}"
     date_stamp = datetime.now().strftime('%Y-%m-%d')
@@ -88,54 +122,79 @@ async def main_process(focus: dict, sites: list):
         search_results = await search_with_jina(query, _logger=wiseflow_logger)
         search_urls = {d['url'] for d in search_results if d.get('url', '') and isURL(d['url'])}
         wiseflow_logger.info(f'get {len(search_urls)} urls from Jina search engine')
-        working_list.update(search_urls - existing_urls)
+        working_list.update(search_urls)
 
     recognized_img_cache = {}
+    rss_sites = [site['url'] for site in sites if site.get('type', 'web') == 'rss']
+    sitemap_sites = [site['url'] for site in sites if site.get('type', 'web') == 'sitemap']
+    feeds, sitemaps = await asyncio.gather(rss_fetcher.fetch_all(focus_id, rss_sites),
+                                           asyncio.gather(*[sitemap_reader.fetch(focus_id, url) for url in sitemap_sites]))
+    sitemaps = dict(zip(sitemap_sites, sitemaps))
     for site in sites:
         if site.get('type', 'web') == 'rss':
-            try:
-                feed = feedparser.parse(site['url'])
-            except Exception as e:
-                wiseflow_logger.warning(f"{site['url']} RSS feed is not valid: {e}")
+            links = feeds[site['url']]
+            if links is None:
+                continue
+            rss_urls = {link for link in links if isURL(link)}
+            wiseflow_logger.debug(f'get {len(rss_urls)} new urls from rss source {site["url"]}')
+            working_list.update(rss_urls)
+        elif site.get('type', 'web') == 'sitemap':
+            links = sitemaps[site['url']]
+            if links is None:
                 continue
-            rss_urls = {entry.link for entry in feed.entries if entry.link and isURL(entry.link)}
-            wiseflow_logger.debug(f'get {len(rss_urls)} urls from rss source {site["url"]}')
-            working_list.update(rss_urls - existing_urls)
+            sitemap_urls = {link for link in links if isURL(link)}
+            wiseflow_logger.debug(f'get {len(sitemap_urls)} new urls from sitemap {site["url"]}')
+            working_list.update(sitemap_urls)
         else:
             if site['url'] not in existing_urls and isURL(site['url']):
                 working_list.add(site['url'])
 
-    crawler = AsyncWebCrawler(config=browser_cfg)
-    await crawler.start()
-    while working_list:
-        url = working_list.pop()
-        existing_urls.add(url)
-        wiseflow_logger.debug(f'process new url, still {len(working_list)} urls in working list')
-        has_common_ext = any(url.lower().endswith(ext) for ext in common_file_exts)
-        if has_common_ext:
-            wiseflow_logger.debug(f'{url} is a common file, skip')
-            continue
+    # urls queued but not finished by a previous (crashed) run of this focus are resumed from here
+    frontier = UrlFrontier(focus_id, host_ready=rate_limiter.is_ready)
+
+    async def enqueue(urls, depth: int = 0):
+        # check-and-add runs before the first await, so two workers can not claim the same url
+        urls = list(urls)
+        new_urls = []
+        for url, _class in zip(urls, classify_urls(urls, lower=True)):
+            if _class.file_ext:
+                wiseflow_logger.debug(f'{url} is a common file, skip')
+                continue
+            if url in existing_urls:
+                continue
+            existing_urls.add(url)
+            new_urls.append(url)
+        # closer to the sources first
+        await frontier.add(new_urls, depth=depth, priority=1 / (1 + depth))
 
+    await enqueue(working_list)
+
+    async def process_url(url: str, depth: int):
+        wiseflow_logger.debug(f'process new url, still {frontier.qsize()} urls in working list')
         parsed_url = urlparse(url)
         existing_urls.add(f"{parsed_url.scheme}://{parsed_url.netloc}")
         existing_urls.add(f"{parsed_url.scheme}://{parsed_url.netloc}/")
         domain = parsed_url.netloc
-            
-        crawler_config.cache_mode = CacheMode.WRITE_ONLY if url in sites_urls else CacheMode.ENABLED
+
+        # workers share crawler_config, so every crawl gets its own copy
+        run_config = crawler_config.clone(cache_mode=CacheMode.REVALIDATE if url in sites_urls else CacheMode.ENABLED)
         try:
-            result = await crawler.arun(url=url, config=crawler_config)
+            async with crawler_pool.lease() as crawler:
+                result = await crawler.arun(url=url, config=run_config,
+                                            fields=scraper_crawl_fields if domain in custom_scrapers else crawl_fields)
         except Exception as e:
             wiseflow_logger.error(e)
-            continue
+            return False
         if not result.success:
             wiseflow_logger.warning(f'{url} failed to crawl')
-            continue
+            return False
         metadata_dict = result.metadata if result.metadata else {}
 
         if domain in custom_scrapers:
             result = custom_scrapers[domain](result)
             raw_markdown = result.content
             used_img = result.images
+            img_scores = {}
             title = result.title
             if title == 'maybe a new_type_article':
                 wiseflow_logger.warning(f'we found a new type here,{url}\n{result}')
@@ -146,13 +205,14 @@ async def main_process(focus: dict, sites: list):
             raw_markdown = result.markdown
             media_dict = result.media if result.media else {}
             used_img = [d['src'] for d in media_dict.get('images', [])]
+            img_scores = {d['src']: d.get('score') for d in media_dict.get('images', [])}
             title = ''
             base_url = ''
             author = ''
             publish_date = ''
         if not raw_markdown:
             wiseflow_logger.warning(f'{url} no content\n{result}\nskip')
-            continue
+            return
         wiseflow_logger.debug('data preprocessing...')
         if not title:
             title = metadata_dict.get('title', '')
@@ -166,7 +226,8 @@ async def main_process(focus: dict, sites: list):
         if not publish_date:
             publish_date = metadata_dict.get('publish_date', '')
 
-        link_dict, links_parts, contents, recognized_img_cache = await pre_process(raw_markdown, base_url, used_img, recognized_img_cache, existing_urls)
+        link_dict, links_parts, contents, _ = await pre_process(raw_markdown, base_url, used_img, recognized_img_cache, existing_urls,
+                                                                img_scores=img_scores)
 
         if link_dict and links_parts:
             wiseflow_logger.debug('links_parts exists, more links detecting...')
@@ -176,10 +237,10 @@ async def main_process(focus: dict, sites: list):
             more_url = await get_more_related_urls(links_texts, link_dict, get_link_prompts, _logger=wiseflow_logger)
             if more_url:
                 wiseflow_logger.debug(f'get {len(more_url)} more related urls, will add to working list')
-                working_list.update(more_url - existing_urls)
-            
+                await enqueue(more_url, depth + 1)
+
         if not contents:
-            continue
+            return
 
         if not author or author.lower() == 'na' or not publish_date or publish_date.lower() == 'na':
             wiseflow_logger.debug('no author or publish date from metadata, will try to get by llm')
@@ -195,6 +256,30 @@ async def main_process(focus: dict, sites: list):
 
         await info_process(url, title, author, publish_date, contents, link_dict, focus_id, get_info_prompts)
 
-    await crawler.close()
+    async def worker():
+        while True:
+            url, depth = await frontier.get()
+            failed = True
+            try:
+                # process_url returns False only if the url could not be crawled
+                failed = await process_url(url, depth) is False
+            except Exception as e:
+                wiseflow_logger.error(f'process {url} failed: {e}')
+            finally:
+                await frontier.task_done(url, failed=failed)
+
+    crawler_pool.open()
+    workers = [asyncio.create_task(worker()) for _ in range(crawl_concurrent_number)]
+    try:
+        await frontier.join()
+    finally:
+        # also when this run is cancelled or fails, so no worker and no browser outlives it
+        for _worker in workers:
+            _worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await frontier.close()
+        await crawler_pool.close()
+    await info_writer.flush()
+    wiseflow_logger.debug(f'image ocr cache: {ocr_cache.stats()}, image filter: {img_filter.stats()}')
     wiseflow_logger.debug(f'task finished, focus_id: {focus_id}')
     
\ No newline at end of file
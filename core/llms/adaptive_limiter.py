@@ -0,0 +1,118 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for llm calls, used in place of a fixed asyncio.Semaphore.
+
+    every successful call whose latency stays within latency_tolerance times the recent average adds 1/limit
+    (so about +1 per round of `limit` calls) up to max_limit. a rate limited call halves the limit, other failures
+    shrink it by a quarter, down to min_limit. calls already in flight when the limit dropped do not shrink it again,
+    so a burst of 429s counts as one congestion signal. a cancelled call is neither a success nor a failure.
+
+    the recent average is an EWMA of successful latencies kept per key (the model): a vl image call and a
+    get_info batch have very different normal latencies, and the average follows a model getting slower or faster
+    instead of comparing every call with the fastest one ever seen.
+
+    pause() blocks new calls of all callers until a moment in the future (e.g. a Retry-After header),
+    a caller waiting out a backoff must do it outside slot() so its slot is free for others.
+    """
+    def __init__(self, initial: int = 1, min_limit: int = 1, max_limit: int = 4,
+                 latency_tolerance: float = 2.0, latency_alpha: float = 0.2) -> None:
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.latency_alpha = latency_alpha
+        self.in_flight = 0
+        self._avg_latency: dict[str, float] = {}
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._cond = asyncio.Condition()
+
+    def _decrease(self, factor: float, started_at: float):
+        if started_at < self._last_decrease:
+            return
+        self.limit = max(self.min_limit, self.limit * factor)
+        self._last_decrease = time.monotonic()
+
+    def _on_success(self, key: str, latency: float):
+        average = self._avg_latency.get(key)
+        if average is None or latency <= average * self.latency_tolerance:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._avg_latency[key] = latency if average is None else \
+            average + self.latency_alpha * (latency - average)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def _acquire(self):
+        while True:
+            wait = self._paused_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            async with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                await self._cond.wait()
+
+    async def _release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, key: str = ''):
+        """
+        hold one in-flight slot for one call, key groups calls of similar latency (the model name).
+        the yielded dict is the call's outcome, set outcome['rate_limited'] or outcome['failed'] before leaving,
+        a call that sets neither is a success.
+        """
+        await self._acquire()
+        started_at = time.monotonic()
+        outcome = {'rate_limited': False, 'failed': False, 'cancelled': False}
+        try:
+            yield outcome
+        except asyncio.CancelledError:
+            outcome['cancelled'] = True
+            raise
+        except BaseException:
+            outcome['failed'] = True
+            raise
+        finally:
+            if outcome['rate_limited']:
+                self._decrease(0.5, started_at)
+            elif outcome['failed']:
+                self._decrease(0.75, started_at)
+            elif not outcome['cancelled']:
+                self._on_success(key, time.monotonic() - started_at)
+            await self._release()
+
+
+def retry_after(headers) -> Optional[float]:
+    """seconds to wait from retry-after-ms / retry-after (seconds or http date) response headers"""
+    if not headers:
+        return None
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
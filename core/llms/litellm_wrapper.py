@@ -2,6 +2,8 @@ from litellm import Router
 from litellm.router import RetryPolicy, AllowedFailsPolicy
 from pydantic import BaseModel, Field
 import os
+from .llm_cache import llm_cache
+from .token_budget import tpm_limiter, count_messages_tokens
 
 
 retry_policy = RetryPolicy(
@@ -86,7 +88,9 @@ router = Router(
 )
 
 
+@llm_cache.cached
 async def litellm_llm(messages: list, model: str, logger=None, **kwargs) -> str:
+    await tpm_limiter.acquire(count_messages_tokens(messages, model) + kwargs.get('max_tokens', 0))
     try:
         response = await router.acompletion(model=model, messages=messages, **kwargs)
         resp = response.choices[0].message.content
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable
+from utils.state_db import open_state_db
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access);
+"""
+
+class LLMCache:
+    """
+    persistent, content-addressed cache of llm responses, keyed by model + messages + call params.
+    today's date is part of the focus statement, so get_link / get_info answers are reused within the same day only:
+    focus explanations often carry relative limits ("past week") that an answer judged on another day would get wrong.
+
+    entries older than ttl seconds are ignored (and dropped), the least recently used ones are evicted once
+    the table holds more than max_entries. empty responses (failed calls) are never stored.
+    hits / misses count the lookups of this process.
+
+    get / set are awaitable: every sqlite call runs on one thread of the cache, never on the event loop.
+    last_access only drives the eviction order, a hit refreshes it at most once per touch_interval seconds.
+    """
+    def __init__(self, db_path: str = '', ttl: float = 7 * 24 * 3600, max_entries: int = 100000,
+                 bypass: bool = False, touch_interval: float = 3600) -> None:
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='llm_cache')
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # opened on the first lookup (by the cache thread), importing the module creates nothing on disk
+        if self._conn is None:
+            self._conn = open_state_db(_SCHEMA, self.db_path, check_same_thread=False)
+        return self._conn
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def make_key(messages: list, model: str, params: dict) -> str:
+        payload = json.dumps({'model': model, 'messages': messages, 'params': params},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def get(self, key: str) -> str:
+        """response stored under key, '' when missing or expired"""
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, model: str, response: str):
+        if not response:
+            return
+        await self._run(self._set, key, model, response)
+
+    def _get(self, key: str) -> str:
+        row = self.conn.execute("SELECT response, created_at, last_access FROM llm_cache WHERE key = ?",
+                                (key,)).fetchone()
+        now = time.time()
+        if row and now - row[1] <= self.ttl:
+            if now - row[2] > self.touch_interval:
+                self.conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+        if row:
+            self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self.misses += 1
+        return ''
+
+    def _set(self, key: str, model: str, response: str):
+        now = time.time()
+        self.conn.execute("INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_access) "
+                          "VALUES (?, ?, ?, ?, ?)", (key, model, response, now, now))
+        self._writes += 1
+        # enforcing the bound on every write would mean a COUNT(*) per call
+        if self._writes % 100 == 0:
+            self.evict()
+
+    def evict(self):
+        self.conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        overflow = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self.conn.execute("DELETE FROM llm_cache WHERE key IN "
+                              "(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)", (overflow,))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def cached(self, func: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+        """
+        decorate an llm call `async def f(messages, model, logger=None, **kwargs) -> str`.
+        pass use_cache=False to a single call to skip the cache, the cache-wide bypass flag skips it for all.
+        """
+        @functools.wraps(func)
+        async def wrapper(messages: list, model: str, logger=None, use_cache: bool = True, **kwargs) -> str:
+            if self.bypass or not use_cache:
+                return await func(messages, model, logger, **kwargs)
+            key = self.make_key(messages, model, kwargs)
+            response = await self.get(key)
+            if response:
+                if logger:
+                    logger.debug(f'llm cache hit, {self.stats()}')
+                return response
+            response = await func(messages, model, logger, **kwargs)
+            await self.set(key, model, response)
+            return response
+        return wrapper
+
+
+llm_cache = LLMCache(ttl=float(os.environ.get('LLM_CACHE_TTL', 7 * 24 * 3600)),
+                     max_entries=int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 100000)),
+                     bypass=os.environ.get('LLM_CACHE_BYPASS', '').lower() in ['true', '1'])
@@ -3,6 +3,9 @@ from openai import AsyncOpenAI as OpenAI
 from openai import RateLimitError, APIError
 import asyncio
 from typing import List, Dict, Any
+from .llm_cache import llm_cache
+from .adaptive_limiter import AdaptiveLimiter, retry_after
+from .token_budget import tpm_limiter, count_messages_tokens
 
 base_url = os.environ.get('LLM_API_BASE', "")
 token = os.environ.get('LLM_API_KEY', "")
@@ -16,11 +19,13 @@ elif not base_url and token:
 else:
     client = OpenAI(api_key=token, base_url=base_url)
 
-# 设置最大并发数为3
-concurrent_number = os.environ.get('LLM_CONCURRENT_NUMBER', 1)
-semaphore = asyncio.Semaphore(int(concurrent_number))
+# 并发上限按 AIMD 自适应：从 LLM_CONCURRENT_NUMBER 起步，健康时逐步增加到 LLM_MAX_CONCURRENT_NUMBER，遇到 429 减半
+concurrent_number = int(os.environ.get('LLM_CONCURRENT_NUMBER', 1))
+limiter = AdaptiveLimiter(initial=concurrent_number,
+                          max_limit=int(os.environ.get('LLM_MAX_CONCURRENT_NUMBER', concurrent_number * 4)))
 
 
+@llm_cache.cached
 async def openai_llm(messages: List, model: str, logger=None, **kwargs) -> str:
     """
     使用OpenAI API异步调用
@@ -39,27 +44,38 @@ async def openai_llm(messages: List, model: str, logger=None, **kwargs) -> str:
         logger.debug(f'model: {model}')
         logger.debug(f'kwargs:\n {kwargs}')
 
-    async with semaphore:  # 使用信号量控制并发
-        # 最大重试次数
-        max_retries = 3
-        # 初始等待时间（秒）
-        wait_time = 30
-        
-        for retry in range(max_retries):
+    # 最大重试次数
+    max_retries = 3
+    # 初始等待时间（秒）
+    wait_time = 30
+
+    # 按 token 计的每分钟限额（LLM_TPM），所有调用共享
+    request_tokens = count_messages_tokens(messages, model) + kwargs.get('max_tokens', 0)
+
+    for retry in range(max_retries):
+        # 退避等待在并发槽之外进行，不占用其他调用的名额
+        backoff = wait_time
+        await tpm_limiter.acquire(request_tokens)
+        async with limiter.slot(model) as outcome:  # 自适应并发控制，延迟基线按模型分别统计
             try:
                 response = await client.chat.completions.create(
                     messages=messages,
                     model=model,
                     **kwargs
                 )
-                
+
                 if logger:
                     logger.debug(f'choices:\n {response.choices}')
                     logger.debug(f'usage:\n {response.usage}')
                 return response.choices[0].message.content
-                
+
             except RateLimitError as e:
-                # 速率限制错误需要重试
+                # 速率限制错误需要重试，优先遵循服务端的 Retry-After，并让所有调用一起暂停
+                outcome['rate_limited'] = True
+                server_wait = retry_after(e.response.headers if getattr(e, 'response', None) else None)
+                if server_wait is not None:
+                    backoff = server_wait
+                    limiter.pause(server_wait)
                 error_msg = f"Rate limit error: {str(e)}. Retry {retry+1}/{max_retries}."
                 if logger:
                     logger.warning(error_msg)
@@ -77,6 +93,7 @@ async def openai_llm(messages: List, model: str, logger=None, **kwargs) -> str:
                         return ''
                     else:
                         # 其他API错误需要重试
+                        outcome['failed'] = True
                         error_msg = f"API error: {e.status_code}. Retry {retry+1}/{max_retries}."
                         if logger:
                             logger.warning(error_msg)
@@ -84,6 +101,7 @@ async def openai_llm(messages: List, model: str, logger=None, **kwargs) -> str:
                             print(error_msg)
                 else:
                     # 未知API错误需要重试
+                    outcome['failed'] = True
                     error_msg = f"Unknown API error: {str(e)}. Retry {retry+1}/{max_retries}."
                     if logger:
                         logger.warning(error_msg)
@@ -91,17 +109,18 @@ async def openai_llm(messages: List, model: str, logger=None, **kwargs) -> str:
                         print(error_msg)
             except Exception as e:
                 # 其他异常需要重试
+                outcome['failed'] = True
                 error_msg = f"Unexpected error: {str(e)}. Retry {retry+1}/{max_retries}."
                 if logger:
                     logger.error(error_msg)
                 else:
                     print(error_msg)
 
-            if retry < max_retries - 1:
-                # 指数退避策略
-                await asyncio.sleep(wait_time)
-                # 下次等待时间翻倍
-                wait_time *= 2
+        if retry < max_retries - 1:
+            # 指数退避策略
+            await asyncio.sleep(backoff)
+            # 下次等待时间翻倍
+            wait_time *= 2
 
     # 如果所有重试都失败
     error_msg = "达到最大重试次数，仍然无法获取有效响应。"
@@ -0,0 +1,138 @@
+import os
+import time
+import asyncio
+import regex as re
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# chinese / japanese / korean chars come out at roughly one token each, latin text at roughly four chars a token
+cjk_pattern = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+# default tokens per request (prompt text only) for each purpose, override with env
+default_budgets = {'get_info': 4000, 'get_link': 1000}
+
+
+@lru_cache(maxsize=16)
+def _encoder(model: str):
+    if tiktoken is None:
+        return None
+    # a failure (e.g. no network to fetch the encoding file) returns None, so it is cached like a success
+    # and the estimate is used, instead of raising and retrying the download on every call
+    try:
+        return tiktoken.encoding_for_model(model.split('/')[-1])
+    except KeyError:
+        # models tiktoken does not know (qwen, glm, deepseek...)
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding('cl100k_base')
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str = '') -> int:
+    """tiktoken count when installed, otherwise a cjk aware estimate"""
+    if not text:
+        return 0
+    encoder = _encoder(model)
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    cjk = len(cjk_pattern.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def count_messages_tokens(messages: list, model: str = '') -> int:
+    total = 0
+    for message in messages:
+        content = message.get('content', '')
+        if isinstance(content, list):
+            # vision messages, only the text parts are counted
+            content = ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+        # a few tokens of role / separators per message
+        total += count_tokens(content, model) + 4
+    return total
+
+
+def batch_token_budget(purpose: str, model: str = '') -> int:
+    """
+    tokens of text allowed in one request for purpose ('get_info' or 'get_link'), from
+    GET_INFO_BATCH_TOKENS / GET_LINK_BATCH_TOKENS, capped per model by LLM_MODEL_BATCH_TOKENS
+    (e.g. "THUDM/GLM-4-9B-0414:8000,glm-4-flash:4000").
+    """
+    budget = int(os.environ.get(f'{purpose.upper()}_BATCH_TOKENS', default_budgets.get(purpose, 2000)))
+    for item in os.environ.get('LLM_MODEL_BATCH_TOKENS', '').split(','):
+        name, _, limit = item.strip().rpartition(':')
+        if name and name == model and limit.isdigit():
+            budget = min(budget, int(limit))
+    return budget
+
+
+def _split_text(text: str, tokens: int, budget: int) -> list[str]:
+    # cut by chars in proportion, good enough for the rare section longer than a whole batch
+    parts = -(-tokens // budget)
+    size = -(-len(text) // parts)
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def pack_texts(texts: list[str], budget: int, model: str = '', sep_tokens: int = 1) -> list[list[str]]:
+    """
+    pack texts in order into batches of at most budget tokens (sep_tokens counted once per text).
+    a text longer than the budget is cut into pieces of its own.
+    """
+    batches = []
+    batch = []
+    used = 0
+    for text in texts:
+        tokens = count_tokens(text, model)
+        pieces = _split_text(text, tokens, budget) if tokens > budget else [text]
+        for piece in pieces:
+            n = (tokens if len(pieces) == 1 else count_tokens(piece, model)) + sep_tokens
+            if batch and used + n > budget:
+                batches.append(batch)
+                batch = []
+                used = 0
+            batch.append(piece)
+            used += n
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class TokenBucket:
+    """
+    tokens-per-minute limiter shared by all llm callers of the process.
+    acquire(n) waits until n tokens are available, a request larger than the whole bucket only waits for a full one.
+    tokens_per_minute <= 0 disables it.
+    """
+    def __init__(self, tokens_per_minute: int) -> None:
+        self.capacity = float(tokens_per_minute)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens: int):
+        if self.capacity <= 0:
+            return
+        tokens = min(tokens, self.capacity)
+        # the lock keeps callers in arrival order, a big request is not starved by small ones
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
+tpm_limiter = TokenBucket(int(os.environ.get('LLM_TPM', 0)))
@@ -9,7 +9,7 @@ import logging
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
 import asyncio
-from general_process import main_process, wiseflow_logger, pb
+from general_process import main_process, wiseflow_logger, apb
 
 counter = 0
 
@@ -17,15 +17,24 @@ async def schedule_task():
     global counter
     while True:
         wiseflow_logger.info(f'task execute loop {counter + 1}')
-        tasks = pb.read('focus_points', filter='activated=True')
-        sites_record = pb.read('sites')
-        jobs = []
-        for task in tasks:
+        tasks = []
+        async for task in apb.iter_read('focus_points', filter='activated=True'):
             if not task['per_hour'] or not task['focuspoint']:
                 continue
             if counter % task['per_hour'] != 0:
                 continue
-            sites = [_record for _record in sites_record if _record['id'] in task['sites']]
+            tasks.append(task)
+
+        # only the sites of the focuses due in this loop
+        site_ids = {_id for task in tasks for _id in task['sites']}
+        sites_record = {}
+        if site_ids:
+            async for _record in apb.iter_read('sites', filter=' || '.join(f'id="{_id}"' for _id in site_ids)):
+                sites_record[_record['id']] = _record
+
+        jobs = []
+        for task in tasks:
+            sites = [sites_record[_id] for _id in task['sites'] if _id in sites_record]
             jobs.append(main_process(task, sites))
 
         counter += 1
@@ -0,0 +1,94 @@
+import asyncio
+import psutil
+from contextlib import asynccontextmanager
+from typing import Optional
+from crawl4ai import AsyncWebCrawler, BrowserConfig, RateLimiter
+
+
+class CrawlerPool:
+    """
+    process-wide pool of started AsyncWebCrawler instances.
+
+    every task (focus loop, wechat message...) leases a crawler for a single crawl instead of launching
+    its own browser, so the number of browsers stays fixed and they are shared by every task running at the same time.
+    a task calls open() before its first lease and close() when done (also on error or cancel), the browsers
+    are closed when the last task leaves and started again by the next lease.
+    page_budget bounds the pages open at the same time across all browsers in the pool. it is only held while a page
+    is fetched, a crawl waiting for its domain's delay or backoff (or served from cache) does not take one.
+    all crawlers share one rate_limiter, so per-domain politeness holds process-wide.
+    """
+    def __init__(self, browser_config: BrowserConfig, logger, size: int = 1, page_budget: int = 6,
+                 memory_threshold_percent: float = 90.0, rate_limiter: Optional[RateLimiter] = None) -> None:
+        self.browser_config = browser_config
+        self.logger = logger
+        self.size = max(size, 1)
+        self.memory_threshold_percent = memory_threshold_percent
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._crawlers: list[AsyncWebCrawler] = []
+        # leases in flight per crawler, keyed by the crawler so a lease outliving a close() never touches a new one
+        self._loads: dict[AsyncWebCrawler, int] = {}
+        self._page_budget = asyncio.Semaphore(max(page_budget, 1))
+        self._start_lock = asyncio.Lock()
+        self._users = 0
+
+    async def _ensure_started(self):
+        if self._crawlers:
+            return
+        async with self._start_lock:
+            if self._crawlers:
+                return
+            self.logger.debug(f'starting crawler pool with {self.size} browsers')
+            crawlers = []
+            for _ in range(self.size):
+                # the pool handles memory pressure itself, a shared browser must not be restarted
+                # by one crawl while other leases are still using it
+                crawler = AsyncWebCrawler(config=self.browser_config,
+                                          memory_threshold_percent=100.0,
+                                          rate_limiter=self.rate_limiter,
+                                          page_budget=self._page_budget)
+                await crawler.start()
+                crawlers.append(crawler)
+            # published at once, the lock-free check above never sees a half started pool
+            self._loads = {crawler: 0 for crawler in crawlers}
+            self._crawlers = crawlers
+
+    async def _wait_for_memory(self):
+        while psutil.virtual_memory().percent >= self.memory_threshold_percent:
+            self.logger.warning(f"Memory usage exceeds {self.memory_threshold_percent}%, hold new crawls for 30s")
+            await asyncio.sleep(30)
+
+    @asynccontextmanager
+    async def lease(self):
+        """lease the least loaded crawler for one crawl"""
+        await self._wait_for_memory()
+        while not self._crawlers:
+            await self._ensure_started()
+        loads = self._loads
+        crawler = min(self._crawlers, key=loads.__getitem__)
+        loads[crawler] += 1
+        try:
+            yield crawler
+        finally:
+            loads[crawler] -= 1
+
+    def open(self):
+        """register a task using the pool, browsers start lazily on its first lease"""
+        self._users += 1
+
+    async def close(self, force: bool = False):
+        """unregister a task, the browsers are closed when no task uses the pool any more (or at once with force)"""
+        self._users = 0 if force else max(self._users - 1, 0)
+        if self._users:
+            return
+        async with self._start_lock:
+            # a task may have opened the pool while this one waited for the lock
+            if self._users:
+                return
+            # taken out before the first await, a new lease starts fresh browsers instead of getting closing ones
+            crawlers, self._crawlers = self._crawlers, []
+            self._loads = {}
+            for crawler in crawlers:
+                try:
+                    await crawler.close()
+                except Exception as e:
+                    self.logger.warning(f'close crawler failed: {e}')
@@ -0,0 +1,176 @@
+import io
+import time
+import asyncio
+import sqlite3
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from .image_probe import head_bytes_limit
+from .state_db import open_state_db
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logo_hashes (
+    hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# frame headers of jpeg, c4 / c8 / cc share the range but are not frames
+_jpeg_sof_markers = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_dimensions(head: bytes) -> Optional[tuple[int, int]]:
+    """(width, height) read from the header bytes of a png / gif / jpeg / webp, None for other or broken data"""
+    try:
+        if head.startswith(b'\x89PNG\r\n\x1a\n'):
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            chunk = head[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b'VP8L':
+                bits = int.from_bytes(head[21:25], 'little')
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b'VP8X':
+                return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+            return None
+        if head.startswith(b'\xff\xd8'):
+            i = 2
+            while i + 9 < len(head):
+                if head[i] != 0xFF:
+                    return None
+                marker = head[i + 1]
+                # fill bytes and markers without a length field
+                if marker == 0xFF:
+                    i += 1
+                    continue
+                if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+                    i += 2
+                    continue
+                if marker in _jpeg_sof_markers:
+                    height, width = struct.unpack('>HH', head[i + 5:i + 9])
+                    return width, height
+                i += 2 + struct.unpack('>H', head[i + 2:i + 4])[0]
+    except struct.error:
+        pass
+    return None
+
+
+def dhash(data: bytes) -> Optional[int]:
+    """64 bits difference hash of a complete image, None without pillow or when the image can not be decoded"""
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            pixels = list(img.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+class ImageFilter:
+    """
+    cheap local checks deciding how an image goes to the visual llm, from its first bytes only (see image_probe):
+    'skip' for icons, spacers and near-duplicates of images the visual llm already judged as logo (NA),
+    'low' for images small enough that the low detail thumbnail loses nothing, or with a low usefulness score
+    (the score of crawl4ai's process_image), 'high' otherwise.
+    logo hashes live in the state db, so every focus and process learns from the others. they are read once and
+    written through one thread of the filter, check / add_logo are awaitable for that and never block the event loop.
+    """
+    def __init__(self, db_path: str = '', min_side: int = 100, min_bytes: int = 2048, low_detail_side: int = 512,
+                 low_detail_score: int = 3, logo_distance: int = 6) -> None:
+        self.db_path = db_path
+        self.min_side = min_side
+        self.min_bytes = min_bytes
+        self.low_detail_side = low_detail_side
+        self.low_detail_score = low_detail_score
+        self.logo_distance = logo_distance
+        self.verdicts = {'skip': 0, 'low': 0, 'high': 0}
+        self._conn = None
+        self._logo_hashes: Optional[set[int]] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image_filter')
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # opened on first use by the filter thread, importing get_info creates nothing on disk
+        if self._conn is None:
+            self._conn = open_state_db(_SCHEMA, self.db_path, check_same_thread=False)
+        return self._conn
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def logo_hashes(self) -> set[int]:
+        if self._logo_hashes is None:
+            hashes = await self._run(self._read_logo_hashes)
+            # another caller may have loaded (and extended) the set meanwhile
+            if self._logo_hashes is None:
+                self._logo_hashes = hashes
+        return self._logo_hashes
+
+    def _read_logo_hashes(self) -> set[int]:
+        return {int(row[0], 16) for row in self.conn.execute("SELECT hash FROM logo_hashes")}
+
+    def fingerprint(self, head: bytes, total: int) -> Optional[int]:
+        # only images that fit entirely in the fetched head are hashed, logos are small
+        if not head or (total >= 0 and len(head) < total) or (total < 0 and len(head) >= head_bytes_limit):
+            return None
+        return dhash(head)
+
+    async def is_known_logo(self, image_hash: Optional[int]) -> bool:
+        if image_hash is None:
+            return False
+        return any((image_hash ^ logo).bit_count() <= self.logo_distance for logo in await self.logo_hashes())
+
+    async def add_logo(self, image_hash: Optional[int], url: str):
+        logo_hashes = await self.logo_hashes()
+        if image_hash is None or image_hash in logo_hashes:
+            return
+        # a flat image (blank, single color) hashes to almost nothing and would match every other flat image
+        if image_hash.bit_count() <= 2 or image_hash.bit_count() >= 62:
+            return
+        logo_hashes.add(image_hash)
+        await self._run(self._insert_logo, image_hash, url)
+
+    def _insert_logo(self, image_hash: int, url: str):
+        self.conn.execute("INSERT OR IGNORE INTO logo_hashes (hash, url, created_at) VALUES (?, ?, ?)",
+                          (f'{image_hash:016x}', url, time.time()))
+
+    async def check(self, head: bytes, total: int, score: Optional[float] = None,
+                    image_hash: Optional[int] = None) -> str:
+        """
+        verdict for one image, head / total as returned by fetch_image_head (empty head when it failed),
+        score from crawl4ai media (None when unknown). unknown facts never lead to a skip.
+        """
+        verdict = 'high'
+        size = image_dimensions(head) if head else None
+        if 0 <= total < self.min_bytes:
+            verdict = 'skip'
+        elif size and max(size) < self.min_side:
+            verdict = 'skip'
+        elif await self.is_known_logo(image_hash):
+            verdict = 'skip'
+        elif size and max(size) <= self.low_detail_side:
+            verdict = 'low'
+        elif score is not None and score <= self.low_detail_score:
+            verdict = 'low'
+        self.verdicts[verdict] += 1
+        return verdict
+
+    def stats(self) -> dict:
+        # known_logos stays 0 until the first image of this process loads them
+        return {**self.verdicts, 'known_logos': len(self._logo_hashes or ())}
@@ -0,0 +1,40 @@
+import httpx
+from typing import Optional
+
+
+# enough for the header of every common image format and a stable content fingerprint
+head_bytes_limit = 64 * 1024
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=15, follow_redirects=True,
+                                    headers={'User-Agent': 'Mozilla/5.0 (compatible; wiseflow)'},
+                                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20))
+    return _client
+
+
+async def fetch_image_head(url: str) -> tuple[bytes, int]:
+    """
+    ranged GET of the first 64KB of an image, return (head bytes, total size in bytes).
+    total size comes from Content-Range / Content-Length, it is -1 when the server does not tell.
+    servers ignoring Range answer 200, then the body is streamed and cut at 64KB.
+    raise on network or http errors.
+    """
+    async with _get_client().stream('GET', url, headers={'Range': f'bytes=0-{head_bytes_limit - 1}'}) as resp:
+        resp.raise_for_status()
+        total = -1
+        content_range = resp.headers.get('content-range', '')
+        if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+            total = int(content_range.rsplit('/', 1)[1])
+        elif resp.status_code == 200 and resp.headers.get('content-length', '').isdigit():
+            total = int(resp.headers['content-length'])
+        head = b''
+        async for chunk in resp.aiter_bytes():
+            head += chunk
+            if len(head) >= head_bytes_limit:
+                break
+    return head[:head_bytes_limit], total
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import os
+from typing import Callable, Optional
+from .pb_api import AsyncPbTalker
+
+
+class InfoWriter:
+    """
+    write-behind buffer for records of one collection (infos).
+
+    put() only appends to memory, records are sent to pocketbase in batches once batch_size is reached or
+    flush_interval seconds have passed. records pocketbase refuses are appended to a jsonl journal,
+    which is replayed by the first start() of the next process, so a pocketbase outage loses nothing.
+    on_saved is called with every record that made it to pocketbase.
+    """
+    def __init__(self, pb: AsyncPbTalker, logger, journal_path: str, collection_name: str = 'infos',
+                 batch_size: int = 20, flush_interval: float = 5.0,
+                 on_saved: Optional[Callable[[dict], None]] = None) -> None:
+        self.pb = pb
+        self.logger = logger
+        self.journal_path = journal_path
+        self.collection_name = collection_name
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.on_saved = on_saved
+        self._buffer: list[dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        # flushes started by put(), the loop only keeps weak references to tasks
+        self._pending: set[asyncio.Task] = set()
+        self._replayed = False
+
+    def _replay_journal(self):
+        # move the journal aside first, records failing again are written to a fresh one
+        replay_path = f"{self.journal_path}.replay"
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as src, open(replay_path, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+            os.remove(self.journal_path)
+        if not os.path.exists(replay_path):
+            return
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._buffer.append(json.loads(line))
+                except json.JSONDecodeError:
+                    self.logger.warning(f'skip broken line in {replay_path}: {line[:100]}')
+        os.remove(replay_path)
+        self.logger.info(f'replaying {len(self._buffer)} records from journal {self.journal_path}')
+
+    def _spill(self, records: list[dict]):
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """replay the journal (once per process) and make sure the periodic flush runs"""
+        if not self._replayed:
+            self._replayed = True
+            self._replay_journal()
+        if not self._flusher or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    def put(self, record: dict):
+        self.start()
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            task = asyncio.create_task(self.flush())
+            self._pending.add(task)
+            task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception():
+            self.logger.error(f'flush {self.collection_name} failed: {task.exception()}')
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._buffer:
+                batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+                ids = await self.pb.add_many(self.collection_name, batch)
+                failed = [record for record, _id in zip(batch, ids) if not _id]
+                if failed:
+                    self.logger.error(f'add {len(failed)} {self.collection_name} failed, writing to {self.journal_path}')
+                    self._spill(failed)
+                if self.on_saved:
+                    for record, _id in zip(batch, ids):
+                        if _id:
+                            self.on_saved(record)
+
+    async def close(self):
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.flush()
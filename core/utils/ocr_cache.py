@@ -0,0 +1,120 @@
+import time
+import asyncio
+import sqlite3
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from .seen_urls import normalize_seen_key
+from .image_probe import fetch_image_head
+from .state_db import open_state_db
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    checked_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class ImageOcrCache:
+    """
+    persistent cache of visual llm outputs for images, shared by all focuses and processes (in the state db).
+
+    the key is the normalized image url plus a fingerprint of its content (hash of the first 64KB and the total size,
+    from one ranged GET), so a logo reused on every page is recognized once, while a new image published under an old
+    url is recognized again. "NA" verdicts (no text, logo, icon...) are stored like any other output.
+    entries expire after ttl seconds. hits / misses / fingerprint failures count this process's lookups.
+
+    fetching the fingerprint costs a request per image, so get_by_url trusts the url alone for recheck_after seconds
+    after its content was last confirmed (stored or hit by key), only then the image is fetched again.
+    get_by_url / get / set are awaitable, their sqlite calls run on one thread of the cache, never on the event loop.
+    """
+    def __init__(self, db_path: str = '', ttl: float = 30 * 24 * 3600, recheck_after: float = 24 * 3600) -> None:
+        self.db_path = db_path
+        self.ttl = ttl
+        self.recheck_after = recheck_after
+        self.hits = 0
+        self.misses = 0
+        self.fingerprint_failures = 0
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ocr_cache')
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # opened (and purged of expired entries) on first use by the cache thread, importing get_info creates nothing on disk
+        if self._conn is None:
+            conn = open_state_db(_SCHEMA, self.db_path, check_same_thread=False)
+            # tables created before checked_at existed, their rows count as never confirmed
+            if 'checked_at' not in {row[1] for row in conn.execute("PRAGMA table_info(ocr_cache)")}:
+                conn.execute("ALTER TABLE ocr_cache ADD COLUMN checked_at REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_url ON ocr_cache (url, checked_at)")
+            self._conn = conn
+            self.purge_expired()
+        return self._conn
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def fetch_head(self, url: str) -> tuple[bytes, int]:
+        """fetch_image_head that never raises, (b'', -1) when the image can not be fetched"""
+        try:
+            return await fetch_image_head(url)
+        except Exception:
+            self.fingerprint_failures += 1
+            return b'', -1
+
+    async def make_key(self, url: str, head: bytes = None, total: int = None) -> str:
+        """key from the url and its content, head / total can be passed when already fetched"""
+        if head is None:
+            head, total = await self.fetch_head(url)
+        # with an empty head (can not fingerprint) the key falls back to the url alone
+        content_hash = hashlib.sha1(head).hexdigest() if head else ''
+        return hashlib.sha256(f'{normalize_seen_key(url)}|{content_hash}|{total}'.encode('utf-8')).hexdigest()
+
+    async def get_by_url(self, url: str) -> str:
+        """result for the url whose content was confirmed within recheck_after, '' otherwise (no request made)"""
+        return await self._run(self._get_by_url, url)
+
+    async def get(self, key: str) -> str:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, url: str, result: str):
+        if not result:
+            return
+        await self._run(self._set, key, url, result)
+
+    def _get_by_url(self, url: str) -> str:
+        now = time.time()
+        row = self.conn.execute("SELECT result FROM ocr_cache WHERE url = ? AND checked_at >= ? AND created_at >= ? "
+                                "ORDER BY checked_at DESC LIMIT 1",
+                                (url, now - self.recheck_after, now - self.ttl)).fetchone()
+        if row:
+            self.hits += 1
+            return row[0]
+        return ''
+
+    def _get(self, key: str) -> str:
+        row = self.conn.execute("SELECT result, created_at FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row and now - row[1] <= self.ttl:
+            self.conn.execute("UPDATE ocr_cache SET checked_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+        self.misses += 1
+        return ''
+
+    def _set(self, key: str, url: str, result: str):
+        now = time.time()
+        self.conn.execute("INSERT OR REPLACE INTO ocr_cache (key, url, result, created_at, checked_at) "
+                          "VALUES (?, ?, ?, ?, ?)", (key, url, result, now, now))
+
+    def purge_expired(self):
+        self.conn.execute("DELETE FROM ocr_cache WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                'fingerprint_failures': self.fingerprint_failures}
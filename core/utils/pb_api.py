@@ -1,7 +1,14 @@
 import os
+import time
+import json
+import base64
+import asyncio
+import httpx
+from collections import deque
 from pocketbase import PocketBase  # Client also works the same
 from pocketbase.client import FileUpload
-from typing import BinaryIO, Optional, List, Dict
+from pocketbase.utils import camel_to_snake
+from typing import AsyncIterator, BinaryIO, Iterator, Optional, List, Dict
 
 
 class PbTalker:
@@ -27,14 +34,16 @@ class PbTalker:
                 else:
                     raise Exception("pocketbase auth failed")
 
-    def read(self, collection_name: str, fields: Optional[List[str]] = None,
-                expand: Optional[List[str]] = None, filter: str = '', skiptotal: bool = True) -> list:
-        results = []
+    def iter_read(self, collection_name: str, fields: Optional[List[str]] = None,
+                  expand: Optional[List[str]] = None, filter: str = '', sort: str = '',
+                  page_size: int = 500, skiptotal: bool = True) -> Iterator[dict]:
+        """yield records page by page instead of materializing the whole collection"""
         i = 1
         while True:
             try:
-                res = self.client.collection(collection_name).get_list(i, 500,
+                res = self.client.collection(collection_name).get_list(i, page_size,
                                                                        {"filter": filter,
+                                                                        "sort": sort,
                                                                         "fields": ','.join(fields) if fields else '',
                                                                         "expand": ','.join(expand) if expand else '',
                                                                         "skiptotal": skiptotal})
@@ -42,13 +51,15 @@ class PbTalker:
             except Exception as e:
                 self.logger.error(f"pocketbase get list failed: {e}")
                 raise e
-            if not res.items:
-                break
             for _res in res.items:
-                attributes = vars(_res)
-                results.append(attributes)
+                yield vars(_res)
+            if len(res.items) < page_size:
+                break
             i += 1
-        return results
+
+    def read(self, collection_name: str, fields: Optional[List[str]] = None,
+                expand: Optional[List[str]] = None, filter: str = '', skiptotal: bool = True) -> list:
+        return list(self.iter_read(collection_name, fields=fields, expand=expand, filter=filter, skiptotal=skiptotal))
 
     def add(self, collection_name: str, body: Dict) -> str:
         try:
@@ -91,3 +102,208 @@ class PbTalker:
         except Exception as e:
             self.logger.error(f"pocketbase view item failed: {e}")
             return {}
+
+
+class AsyncPbTalker:
+    """
+    asyncio counterpart of PbTalker, same read/add/update/delete/view/upload surface and return conventions,
+    built on one keep-alive httpx.AsyncClient so awaiting a write never blocks the event loop.
+
+    auth happens lazily on the first request (superuser first, then users), the token is refreshed shortly
+    before it expires and once more if pocketbase answers 401.
+    """
+    def __init__(self, logger, max_connections: int = 10) -> None:
+        url = os.environ.get('PB_API_BASE', "http://127.0.0.1:8090")
+        self.logger = logger
+        self.logger.debug(f"initializing async pocketbase client: {url}")
+        self.client = httpx.AsyncClient(base_url=url, timeout=30,
+                                        limits=httpx.Limits(max_connections=max_connections,
+                                                            max_keepalive_connections=max_connections))
+        self._credentials = None
+        auth = os.environ.get('PB_API_AUTH', '')
+        if not auth or "|" not in auth:
+            self.logger.warning("invalid email|password found, will handle with not auth, make sure you have set the collection rule by anyone")
+        else:
+            self._credentials = tuple(auth.split('|', 1))
+        self._token = ''
+        self._token_expires = 0.0
+        self._auth_collection = ''
+        self._auth_lock = asyncio.Lock()
+        self._batch_enabled = True
+
+    @staticmethod
+    def _token_expiry(token: str) -> float:
+        # pocketbase tokens are JWT, read exp without verifying
+        try:
+            payload = token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+        except Exception:
+            return time.time() + 600
+
+    async def _authenticate(self, force: bool = False):
+        if not self._credentials:
+            return
+        async with self._auth_lock:
+            if not force and self._token and time.time() < self._token_expires - 300:
+                return
+            if self._token:
+                resp = await self.client.post(f"/api/collections/{self._auth_collection}/auth-refresh",
+                                              headers={"Authorization": self._token})
+                if resp.status_code == 200:
+                    self._token = resp.json()['token']
+                    self._token_expires = self._token_expiry(self._token)
+                    return
+            email, password = self._credentials
+            for collection in ('_superusers', 'users'):
+                resp = await self.client.post(f"/api/collections/{collection}/auth-with-password",
+                                              json={"identity": email, "password": password})
+                if resp.status_code == 200:
+                    self._token = resp.json()['token']
+                    self._token_expires = self._token_expiry(self._token)
+                    self._auth_collection = collection
+                    self.logger.info(f"async pocketbase ready authenticated as {collection} - {email}")
+                    return
+            raise Exception("pocketbase auth failed")
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        await self._authenticate()
+        headers = {"Authorization": self._token} if self._token else {}
+        resp = await self.client.request(method, path, headers=headers, **kwargs)
+        if resp.status_code == 401 and self._credentials:
+            await self._authenticate(force=True)
+            resp = await self.client.request(method, path, headers={"Authorization": self._token}, **kwargs)
+        resp.raise_for_status()
+        return resp
+
+    @staticmethod
+    def _record(data: Dict) -> Dict:
+        # same keys as vars(Record) of the sync sdk
+        return {camel_to_snake(key).replace("@", ""): value for key, value in data.items()}
+
+    async def _get_page(self, collection_name: str, page: int, params: dict, skiptotal: bool = True) -> dict:
+        try:
+            resp = await self._request("GET", f"/api/collections/{collection_name}/records",
+                                       params={**params, "page": page, "skipTotal": skiptotal})
+        except Exception as e:
+            self.logger.error(f"pocketbase get list failed: {e}")
+            raise e
+        return resp.json()
+
+    async def iter_read(self, collection_name: str, fields: Optional[List[str]] = None,
+                        expand: Optional[List[str]] = None, filter: str = '', sort: str = '',
+                        page_size: int = 500, prefetch: int = 0, skiptotal: bool = True) -> AsyncIterator[dict]:
+        """
+        yield records page by page, filter/sort/fields are applied by pocketbase.
+
+        skiptotal=False makes pocketbase count the matching records on every page (slower on big collections).
+        with prefetch > 0 the first page always asks for the total, then up to prefetch following pages are
+        requested in parallel while the current one is consumed. records are always yielded in page order.
+        """
+        params = {"perPage": page_size,
+                  "filter": filter,
+                  "sort": sort,
+                  "fields": ','.join(fields) if fields else '',
+                  "expand": ','.join(expand) if expand else ''}
+        if prefetch <= 0:
+            i = 1
+            while True:
+                items = (await self._get_page(collection_name, i, params, skiptotal=skiptotal)).get('items', [])
+                for item in items:
+                    yield self._record(item)
+                if len(items) < page_size:
+                    return
+                i += 1
+
+        first = await self._get_page(collection_name, 1, params, skiptotal=False)
+        total_pages = first.get('totalPages', 1)
+        for item in first.get('items', []):
+            yield self._record(item)
+        pending = deque()
+        next_page = 2
+        try:
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < prefetch:
+                    pending.append(asyncio.create_task(self._get_page(collection_name, next_page, params,
+                                                                          skiptotal=skiptotal)))
+                    next_page += 1
+                for item in (await pending.popleft()).get('items', []):
+                    yield self._record(item)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def read(self, collection_name: str, fields: Optional[List[str]] = None,
+                   expand: Optional[List[str]] = None, filter: str = '', skiptotal: bool = True) -> list:
+        return [record async for record in self.iter_read(collection_name, fields=fields, expand=expand, filter=filter,
+                                                          skiptotal=skiptotal)]
+
+    async def add(self, collection_name: str, body: Dict) -> str:
+        try:
+            resp = await self._request("POST", f"/api/collections/{collection_name}/records", json=body)
+        except Exception as e:
+            self.logger.error(f"pocketbase create failed: {e}")
+            return ''
+        return resp.json()['id']
+
+    async def add_many(self, collection_name: str, bodies: List[Dict]) -> List[str]:
+        """
+        create several records, return their ids in order ('' for the ones that failed).
+
+        uses the batch api (pocketbase >= 0.23, must be enabled in settings) when available, it is
+        all-or-nothing, so on failure the records are sent again one by one in parallel to isolate the bad ones.
+        """
+        if not bodies:
+            return []
+        if self._batch_enabled and len(bodies) > 1:
+            try:
+                resp = await self._request("POST", "/api/batch", json={"requests": [
+                    {"method": "POST", "url": f"/api/collections/{collection_name}/records", "body": body}
+                    for body in bodies]})
+                return [item.get('body', {}).get('id', '') for item in resp.json()]
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code in (403, 404):
+                    self.logger.info("pocketbase batch api not available, will create records one by one")
+                    self._batch_enabled = False
+                else:
+                    self.logger.warning(f"pocketbase batch create failed: {e}, will retry one by one")
+            except Exception as e:
+                self.logger.warning(f"pocketbase batch create failed: {e}, will retry one by one")
+        return list(await asyncio.gather(*[self.add(collection_name, body) for body in bodies]))
+
+    async def update(self, collection_name: str, id: str, body: Dict) -> str:
+        try:
+            resp = await self._request("PATCH", f"/api/collections/{collection_name}/records/{id}", json=body)
+        except Exception as e:
+            self.logger.error(f"pocketbase update failed: {e}")
+            return ''
+        return resp.json()['id']
+
+    async def delete(self, collection_name: str, id: str) -> bool:
+        try:
+            await self._request("DELETE", f"/api/collections/{collection_name}/records/{id}")
+        except Exception as e:
+            self.logger.error(f"pocketbase delete failed: {e}")
+            return False
+        return True
+
+    async def upload(self, collection_name: str, id: str, key: str, file_name: str, file: BinaryIO) -> str:
+        try:
+            resp = await self._request("PATCH", f"/api/collections/{collection_name}/records/{id}",
+                                       files={key: (file_name, file)})
+        except Exception as e:
+            self.logger.error(f"pocketbase update failed: {e}")
+            return ''
+        return resp.json()['id']
+
+    async def view(self, collection_name: str, item_id: str, fields: Optional[List[str]] = None) -> Dict:
+        try:
+            resp = await self._request("GET", f"/api/collections/{collection_name}/records/{item_id}",
+                                       params={"fields": ','.join(fields) if fields else ''})
+            return self._record(resp.json())
+        except Exception as e:
+            self.logger.error(f"pocketbase view item failed: {e}")
+            return {}
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,119 @@
+import time
+import asyncio
+from typing import Optional
+import httpx
+import feedparser
+from .state_db import open_state_db
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rss_feeds (
+    focus_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    etag TEXT NOT NULL DEFAULT '',
+    last_modified TEXT NOT NULL DEFAULT '',
+    last_guid TEXT NOT NULL DEFAULT '',
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (focus_id, url)
+);
+"""
+
+
+def _entry_guid(entry) -> str:
+    return entry.get('id') or entry.get('link') or ''
+
+
+def _entry_time(entry):
+    return entry.get('published_parsed') or entry.get('updated_parsed')
+
+
+def new_entries(entries: list, last_guid: str) -> list:
+    """
+    entries published after the one with last_guid, newest first.
+    feeds are sorted newest first when every entry carries a date (some feeds list oldest first),
+    when last_guid is not in the feed any more (or never seen) every entry counts as new.
+    """
+    if entries and all(_entry_time(entry) for entry in entries):
+        entries = sorted(entries, key=_entry_time, reverse=True)
+    result = []
+    for entry in entries:
+        if last_guid and _entry_guid(entry) == last_guid:
+            break
+        result.append(entry)
+    return result
+
+
+class RssFetcher:
+    """
+    fetch rss / atom feeds concurrently with conditional requests.
+    per (focus, feed) the ETag / Last-Modified validators and the guid of the newest entry handed out are kept
+    in the state db, so an unchanged feed costs one 304 and a changed one only yields its new entries.
+    state is per focus, two focuses reading the same feed each get every entry.
+    """
+    def __init__(self, logger, db_path: str = '', max_connections: int = 10, timeout: float = 30) -> None:
+        self.logger = logger
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self.conn = open_state_db(_SCHEMA, db_path)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True,
+                                             headers={'User-Agent': 'Mozilla/5.0 (compatible; wiseflow)'},
+                                             limits=httpx.Limits(max_connections=self.max_connections))
+        return self._client
+
+    def _state(self, focus_id: str, url: str) -> tuple[str, str, str]:
+        row = self.conn.execute("SELECT etag, last_modified, last_guid FROM rss_feeds WHERE focus_id = ? AND url = ?",
+                                (focus_id, url)).fetchone()
+        return row if row else ('', '', '')
+
+    def _save_state(self, focus_id: str, url: str, etag: str, last_modified: str, last_guid: str):
+        self.conn.execute("INSERT OR REPLACE INTO rss_feeds (focus_id, url, etag, last_modified, last_guid, fetched_at) "
+                          "VALUES (?, ?, ?, ?, ?, ?)", (focus_id, url, etag, last_modified, last_guid, time.time()))
+
+    async def fetch(self, focus_id: str, url: str) -> Optional[list[str]]:
+        """
+        links of the entries new since the last fetch of this feed for this focus,
+        [] when the feed did not change (304), None when it can not be fetched or parsed.
+        """
+        etag, last_modified, last_guid = self._state(focus_id, url)
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            resp = await self._get_client().get(url, headers=headers)
+        except Exception as e:
+            self.logger.warning(f"{url} RSS feed can not be fetched: {e}")
+            return None
+        if resp.status_code == 304:
+            self.logger.debug(f'rss source {url} not modified')
+            return []
+        if resp.status_code != 200:
+            self.logger.warning(f"{url} RSS feed can not be fetched: http {resp.status_code}")
+            return None
+
+        # parsing a big feed is cpu bound, keep it off the event loop
+        feed = await asyncio.to_thread(feedparser.parse, resp.content,
+                                       response_headers={k.lower(): v for k, v in resp.headers.items()})
+        if feed.bozo and not feed.entries:
+            self.logger.warning(f"{url} RSS feed is not valid: {feed.get('bozo_exception', '')}")
+            return None
+
+        entries = new_entries(feed.entries, last_guid)
+        if entries:
+            last_guid = _entry_guid(entries[0])
+        self._save_state(focus_id, url, resp.headers.get('etag', ''), resp.headers.get('last-modified', ''), last_guid)
+        return [entry.get('link', '') for entry in entries if entry.get('link', '')]
+
+    async def fetch_all(self, focus_id: str, urls: list[str]) -> dict[str, Optional[list[str]]]:
+        results = await asyncio.gather(*[self.fetch(focus_id, url) for url in urls])
+        return dict(zip(urls, results))
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
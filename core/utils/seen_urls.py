@@ -0,0 +1,101 @@
+import hashlib
+import time
+from typing import Iterable
+from urllib.parse import urlparse
+from .state_db import open_state_db
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_urls (
+    focus_id TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    PRIMARY KEY (focus_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seen_bootstrap (
+    focus_id TEXT PRIMARY KEY,
+    bootstrapped_at REAL NOT NULL
+);
+"""
+
+_default_ports = {'http': ':80', 'https': ':443'}
+
+
+def normalize_seen_key(url: str) -> str:
+    """
+    canonical form used for dedup: lower-cased scheme and host, no default port, no fragment,
+    no trailing slash (so https://a.com and https://a.com/ are the same key). query is kept as is.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    default_port = _default_ports.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    path = parsed.path.rstrip('/')
+    key = f"{scheme}://{netloc}{path}"
+    if parsed.params:
+        key = f"{key};{parsed.params}"
+    if parsed.query:
+        key = f"{key}?{parsed.query}"
+    return key
+
+
+def url_hash(url: str) -> int:
+    # 64 bit signed, fits a sqlite INTEGER; collisions are negligible at millions of urls
+    digest = hashlib.blake2b(normalize_seen_key(url).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class SeenUrlIndex:
+    """
+    persistent per-focus set of urls that already produced infos, stored as 8 bytes hashes of the
+    normalized url in the state db (see state_db).
+
+    it is filled from pocketbase once per focus (bootstrap) and then kept up to date by info_process,
+    so main_process no longer pages through the whole infos collection on every run.
+    """
+    def __init__(self, db_path: str = '') -> None:
+        self.conn = open_state_db(_SCHEMA, db_path)
+
+    def needs_bootstrap(self, focus_id: str) -> bool:
+        return not self.conn.execute("SELECT 1 FROM seen_bootstrap WHERE focus_id = ?", (focus_id,)).fetchone()
+
+    def bootstrap(self, focus_id: str, urls: Iterable[str]):
+        """load the urls already known to pocketbase, done once per focus"""
+        self.conn.execute('BEGIN')
+        try:
+            self.add(focus_id, urls)
+            self.conn.execute("INSERT OR REPLACE INTO seen_bootstrap (focus_id, bootstrapped_at) VALUES (?, ?)",
+                              (focus_id, time.time()))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def add(self, focus_id: str, urls: Iterable[str]):
+        self.conn.executemany("INSERT OR IGNORE INTO seen_urls (focus_id, key) VALUES (?, ?)",
+                              ((focus_id, url_hash(url)) for url in urls))
+
+    def contains(self, focus_id: str, url: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM seen_urls WHERE focus_id = ? AND key = ?",
+                                 (focus_id, url_hash(url))).fetchone() is not None
+
+    def view(self, focus_id: str) -> 'FocusSeenUrls':
+        return FocusSeenUrls(self, focus_id)
+
+
+class FocusSeenUrls:
+    """
+    set-like view used by one main_process run: `in` checks the urls claimed in this run and the persistent
+    index, add() only claims for this run (a url becomes persistent once its infos are saved).
+    """
+    def __init__(self, index: SeenUrlIndex, focus_id: str) -> None:
+        self.index = index
+        self.focus_id = focus_id
+        self._claimed = set()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._claimed or self.index.contains(self.focus_id, url)
+
+    def add(self, url: str):
+        self._claimed.add(url)
@@ -0,0 +1,195 @@
+import re
+import time
+import zlib
+from collections import deque
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from xml.etree.ElementTree import XMLPullParser, ParseError
+import httpx
+from .seen_urls import url_hash
+from .state_db import open_state_db
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sitemap_runs (
+    focus_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    last_run REAL NOT NULL,
+    PRIMARY KEY (focus_id, url)
+);
+CREATE TABLE IF NOT EXISTS sitemap_urls (
+    focus_id TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    PRIMARY KEY (focus_id, key)
+) WITHOUT ROWID;
+"""
+
+
+_year_month = re.compile(r'(\d{4})(?:-(\d{2}))?')
+
+
+def parse_lastmod(value: str) -> Optional[float]:
+    """
+    timestamp of a W3C datetime lastmod, None when missing or invalid. a bare date (or year, or year-month) counts
+    as the end of that period, so a page published later in the period of the previous run is not filtered out.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    matched = _year_month.fullmatch(value)
+    if matched:
+        year, month = int(matched[1]), int(matched[2] or 12)
+        if not 1 <= month <= 12:
+            return None
+        try:
+            return datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            return None
+    # fromisoformat takes a trailing Z only from python 3.11 on
+    if value[-1] in 'Zz':
+        value = value[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    stamp = parsed.timestamp()
+    return stamp + 86400 if len(value) == 10 else stamp
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+class SitemapReader:
+    """
+    discover article urls of a site from its sitemap instead of crawling the homepage and asking the llm.
+
+    sitemaps are streamed through an incremental xml parser (plain or gzip), sitemap indexes are followed
+    breadth first, entries (and child sitemaps) whose lastmod is older than the previous run are dropped,
+    and urls already handed out for the focus are not handed out again (entries without lastmod rely on this).
+    the first run of a focus only looks back max_age seconds: its undated entries can not be aged, so they are
+    recorded as already seen without being handed out (a baseline), later runs hand out the undated ones that
+    appear after it. a run stopped at max_urls does not move the previous run time, the rest comes out next time.
+    """
+    def __init__(self, logger, db_path: str = '', max_age: float = 3 * 24 * 3600, max_urls: int = 500,
+                 max_sitemaps: int = 50, timeout: float = 30) -> None:
+        self.logger = logger
+        self.max_age = max_age
+        self.max_urls = max_urls
+        self.max_sitemaps = max_sitemaps
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self.conn = open_state_db(_SCHEMA, db_path)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True,
+                                             headers={'User-Agent': 'Mozilla/5.0 (compatible; wiseflow)'})
+        return self._client
+
+    async def _entries(self, url: str) -> AsyncIterator[tuple[str, str, str]]:
+        """(kind, loc, lastmod) of one sitemap as it downloads, kind is 'url' or 'sitemap'"""
+        parser = XMLPullParser(events=('start', 'end'))
+        decompressor = None
+        root = None
+        async with self._get_client().stream('GET', url) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.aiter_bytes():
+                if decompressor is None:
+                    # .xml.gz files are served as is, not with a Content-Encoding httpx would undo
+                    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16) if chunk[:2] == b'\x1f\x8b' else False
+                if decompressor:
+                    chunk = decompressor.decompress(chunk)
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == 'start':
+                        if root is None:
+                            root = elem
+                        continue
+                    kind = _local_name(elem.tag)
+                    if kind not in ('url', 'sitemap') or elem is root:
+                        continue
+                    loc, lastmod = '', ''
+                    for child in elem:
+                        name = _local_name(child.tag)
+                        if name == 'loc':
+                            loc = (child.text or '').strip()
+                        elif name == 'lastmod':
+                            lastmod = child.text or ''
+                    # drop what has been read, memory stays flat on sitemaps with 50k entries
+                    root.clear()
+                    if loc:
+                        yield kind, loc, lastmod
+        parser.close()
+
+    async def fetch(self, focus_id: str, url: str) -> Optional[list[str]]:
+        """new article urls of the sitemap (or sitemap index) at url for this focus, None when it can not be read"""
+        row = self.conn.execute("SELECT last_run FROM sitemap_runs WHERE focus_id = ? AND url = ?",
+                                (focus_id, url)).fetchone()
+        run_started_at = time.time()
+        since = row[0] if row else run_started_at - self.max_age
+        first_run = row is None
+
+        new_urls = []
+        # undated urls of a first run, marked as seen but not handed out, they may be years old
+        baseline = []
+        pending = deque([url])
+        visited = set()
+        # only a run that read everything moves last_run forward
+        complete = True
+        while pending and len(new_urls) < self.max_urls:
+            sitemap_url = pending.popleft()
+            if sitemap_url in visited:
+                continue
+            if len(visited) >= self.max_sitemaps:
+                self.logger.warning(f'sitemap {url} has more than {self.max_sitemaps} sitemaps, stop following')
+                complete = False
+                break
+            visited.add(sitemap_url)
+            try:
+                async with aclosing(self._entries(sitemap_url)) as entries:
+                    async for kind, loc, lastmod in entries:
+                        stamp = parse_lastmod(lastmod)
+                        if stamp is not None and stamp < since:
+                            continue
+                        if kind == 'sitemap':
+                            pending.append(loc)
+                            continue
+                        if self.conn.execute("SELECT 1 FROM sitemap_urls WHERE focus_id = ? AND key = ?",
+                                             (focus_id, url_hash(loc))).fetchone():
+                            continue
+                        if first_run and stamp is None:
+                            baseline.append(loc)
+                            continue
+                        new_urls.append(loc)
+                        if len(new_urls) >= self.max_urls:
+                            complete = False
+                            break
+            except (httpx.HTTPError, ParseError, zlib.error) as e:
+                self.logger.warning(f'sitemap {sitemap_url} can not be read: {e}')
+                if sitemap_url == url:
+                    return None
+                complete = False
+
+        self.conn.execute('BEGIN')
+        try:
+            self.conn.executemany("INSERT OR IGNORE INTO sitemap_urls (focus_id, key) VALUES (?, ?)",
+                                  ((focus_id, url_hash(loc)) for loc in new_urls + baseline))
+            if complete:
+                self.conn.execute("INSERT OR REPLACE INTO sitemap_runs (focus_id, url, last_run) VALUES (?, ?, ?)",
+                                  (focus_id, url, run_started_at))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        if baseline:
+            self.logger.info(f'sitemap {url}: {len(baseline)} urls without lastmod taken as baseline, not crawled')
+        return new_urls
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
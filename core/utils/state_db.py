@@ -0,0 +1,25 @@
+import os
+import sqlite3
+
+
+def default_state_path() -> str:
+    # same folder as crawl4ai.db; frontier, seen urls, feeds, sitemaps and the llm / ocr caches share this file
+    folder = os.path.join(os.environ.get("PROJECT_DIR", ""), ".crawl4ai")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, "state.db")
+
+
+def open_state_db(schema: str, db_path: str = '', check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    connect to the state db (default_state_path() unless db_path is given) and create the tables of schema.
+
+    every store opens its own connection in autocommit mode, in WAL so that the readers of one process never wait
+    for the writer of another, and waits up to 30s for the write lock instead of failing on SQLITE_BUSY.
+    pass check_same_thread=False when the connection is owned by an executor thread.
+    """
+    conn = sqlite3.connect(db_path or default_state_path(), isolation_level=None, timeout=30,
+                           check_same_thread=check_same_thread)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(schema)
+    return conn
@@ -0,0 +1,61 @@
+from typing import NamedTuple
+import regex as re
+from .general_utils import url_pattern
+
+
+common_file_exts = [
+    'jpg', 'jpeg', 'png', 'gif', 'pdf', 'doc', 'docx', 'svg', 'm3u8',
+    'mp4', 'mp3', 'wav', 'avi', 'mov', 'wmv', 'flv', 'webp', 'webm',
+    'zip', 'rar', '7z', 'tar', 'gz', 'bz2',
+    'txt', 'csv', 'xls', 'xlsx', 'ppt', 'pptx',
+    'json', 'xml', 'yaml', 'yml', 'css', 'js', 'php', 'asp', 'jsp'
+]
+common_tlds = [
+    '.com', '.cn', '.net', '.org', '.edu', '.gov', '.io', '.co',
+    '.info', '.biz', '.me', '.tv', '.cc', '.xyz', '.app', '.dev',
+    '.cloud', '.ai', '.tech', '.online', '.store', '.shop', '.site',
+    '.top', '.vip', '.pro', '.ltd', '.group', '.team', '.work'
+]
+
+# str.endswith(tuple) checks every suffix in one C call instead of a python level any() loop
+file_ext_suffixes = tuple(common_file_exts)
+# jpg / jpeg / png are the images worth sending to the visual llm
+non_image_file_ext_suffixes = tuple(ext for ext in common_file_exts if ext not in ['jpg', 'jpeg', 'png'])
+# a bare domain, with or without the trailing slash
+tld_suffixes = tuple(common_tlds) + tuple(f'{tld}/' for tld in common_tlds)
+
+# compiled once instead of going through the pattern cache on every findall / finditer
+url_regex = re.compile(url_pattern)
+# ![alt](src) and [text](url), non-greedy and allowing one level of nested parentheses
+md_img_regex = re.compile(r'(!\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\))', re.DOTALL)
+md_link_regex = re.compile(r'(\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\))', re.DOTALL)
+# §alt||src§, the marker pre_process turns markdown images into
+img_marker_regex = re.compile(r'(§(.*?)\|\|(.*?)§)', re.DOTALL)
+js_link_regex = re.compile(r'<javascript:.*?>')
+
+
+def has_common_file_ext(url: str) -> bool:
+    return url.endswith(file_ext_suffixes)
+
+
+def has_non_image_file_ext(url: str) -> bool:
+    return url.endswith(non_image_file_ext_suffixes)
+
+
+def has_common_tld(url: str) -> bool:
+    return url.endswith(tld_suffixes)
+
+
+class UrlClass(NamedTuple):
+    file_ext: bool
+    tld: bool
+
+
+def classify_urls(urls: list[str], lower: bool = False) -> list[UrlClass]:
+    """
+    classify a batch of urls at once: whether each ends with a common file extension and whether it is
+    a bare common tld (site root). lower=True compares the lower-cased url.
+    """
+    if lower:
+        urls = [url.lower() for url in urls]
+    return [UrlClass(url.endswith(file_ext_suffixes), url.endswith(tld_suffixes)) for url in urls]
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlparse
+from .state_db import open_state_db
+
+
+QUEUED = 'queued'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    focus_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    host TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    depth INTEGER NOT NULL DEFAULT 0,
+    priority REAL NOT NULL DEFAULT 0,
+    discovered_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (focus_id, url)
+);
+CREATE INDEX IF NOT EXISTS idx_frontier_pick ON frontier (focus_id, state, priority DESC, discovered_at);
+"""
+
+
+class UrlFrontier:
+    """
+    durable work queue of one focus for main_process workers, stored in the state db (see state_db).
+
+    every url keeps its state (queued / in_progress / done / failed), discovery depth, source focus and
+    priority score. urls discovered but not processed before a crash stay queued (or in_progress, which is
+    reset once per process) and are resumed by the next run of the focus.
+    only a small buffer of the best queued urls is held in memory, the rest waits in the db.
+
+    the buffer is kept in one deque per host and handed out round-robin, so a listing page that yields
+    fifty links of the same site does not line up fifty workers behind that site's politeness limit.
+    host_ready (e.g. RateLimiter.is_ready) lets get() skip hosts that can not be fetched right now.
+
+    the worker side follows the asyncio.Queue protocol: get / task_done / join / qsize, with add / task_done
+    awaitable: every sqlite call runs on one thread of the frontier, never on the event loop.
+    """
+    # in_progress rows left by a crashed process are requeued once per focus, not by every main_process call
+    # (the wechat listener may run several main_process of the same focus at the same time)
+    _recovered_focuses: set = set()
+
+    def __init__(self, focus_id: str, db_path: str = '', host_ready: Optional[Callable[[str], bool]] = None,
+                 buffer_size: int = 64) -> None:
+        self.focus_id = focus_id
+        self.host_ready = host_ready
+        self.buffer_size = max(buffer_size, 1)
+        # a url done (or failed) before this moment belongs to a previous run and may be queued again
+        self.run_started_at = time.time()
+        # one thread owns the connection, so statements never run concurrently and never block the loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='frontier')
+        self.conn = open_state_db(_SCHEMA, db_path, check_same_thread=False)
+        if focus_id not in UrlFrontier._recovered_focuses:
+            self.conn.execute("UPDATE frontier SET state = ? WHERE focus_id = ? AND state = ?",
+                              (QUEUED, focus_id, IN_PROGRESS))
+            UrlFrontier._recovered_focuses.add(focus_id)
+
+        self._by_host: dict[str, deque] = {}
+        self._rotation: deque = deque()
+        self._in_flight = 0
+        # queued rows in the db, counted once here then kept up to date by add / refill (no COUNT per call)
+        self._queued = self.conn.execute("SELECT COUNT(*) FROM frontier WHERE focus_id = ? AND state = ?",
+                                         (focus_id, QUEUED)).fetchone()[0]
+        self._has_items = asyncio.Event()
+        self._finished = asyncio.Event()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def qsize(self) -> int:
+        return self._queued + sum(len(urls) for urls in self._by_host.values())
+
+    async def add(self, urls: Iterable[str], depth: int = 0, priority: float = 0.0) -> int:
+        """
+        queue urls, return how many were actually (re)queued.
+
+        a url already queued or in progress is left alone. a url done or failed in a previous run is queued
+        again (keeping its lowest depth and highest priority), one finished in this run is not.
+        """
+        now = time.time()
+        rows = [(self.focus_id, url, urlparse(url).netloc, depth, priority, now, now, self.run_started_at)
+                for url in urls]
+        if not rows:
+            return 0
+        added = await self._run(self._insert, rows)
+        if added:
+            self._queued += added
+            self._finished.clear()
+            self._has_items.set()
+        return added
+
+    def _insert(self, rows: list) -> int:
+        cursor = self.conn.executemany(
+            """INSERT INTO frontier (focus_id, url, host, state, depth, priority, discovered_at, updated_at)
+               VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)
+               ON CONFLICT (focus_id, url) DO UPDATE SET
+                   state = 'queued',
+                   depth = MIN(depth, excluded.depth),
+                   priority = MAX(priority, excluded.priority),
+                   updated_at = excluded.updated_at
+               WHERE state IN ('done', 'failed') AND updated_at < ?""",
+            rows)
+        return max(cursor.rowcount, 0)
+
+    def _claim(self) -> list:
+        rows = self.conn.execute(
+            """SELECT url, host, depth FROM frontier WHERE focus_id = ? AND state = ?
+               ORDER BY priority DESC, discovered_at LIMIT ?""",
+            (self.focus_id, QUEUED, self.buffer_size)).fetchall()
+        if rows:
+            now = time.time()
+            self.conn.executemany("UPDATE frontier SET state = ?, updated_at = ? WHERE focus_id = ? AND url = ?",
+                                  [(IN_PROGRESS, now, self.focus_id, url) for url, _, _ in rows])
+        return rows
+
+    async def _refill(self):
+        rows = await self._run(self._claim)
+        if not rows:
+            # another frontier of the same focus (wechat listener) may have claimed the rows counted here
+            self._queued = 0
+            return
+        self._queued = max(self._queued - len(rows), 0)
+        for url, host, depth in rows:
+            urls = self._by_host.get(host)
+            if not urls:
+                urls = self._by_host[host] = deque()
+                self._rotation.append(host)
+            urls.append((url, depth))
+
+    def _pick_host(self) -> str:
+        if self.host_ready:
+            for _ in range(len(self._rotation)):
+                if self.host_ready(self._rotation[0]):
+                    break
+                self._rotation.rotate(-1)
+        return self._rotation.popleft()
+
+    async def get(self) -> tuple[str, int]:
+        """return the next (url, depth) to process"""
+        while True:
+            if not self._rotation:
+                await self._refill()
+            if self._rotation:
+                break
+            if self._is_drained():
+                self._finished.set()
+            self._has_items.clear()
+            await self._has_items.wait()
+
+        host = self._pick_host()
+        urls = self._by_host[host]
+        url, depth = urls.popleft()
+        if urls:
+            self._rotation.append(host)
+        else:
+            del self._by_host[host]
+        self._in_flight += 1
+        return url, depth
+
+    async def task_done(self, url: str, failed: bool = False):
+        if self._in_flight <= 0:
+            raise ValueError('task_done() called too many times')
+        try:
+            await self._run(self.conn.execute,
+                            "UPDATE frontier SET state = ?, updated_at = ? WHERE focus_id = ? AND url = ?",
+                            (FAILED if failed else DONE, time.time(), self.focus_id, url))
+        finally:
+            # counted in flight until its state is written, join() never returns before that
+            self._in_flight -= 1
+            if self._is_drained():
+                self._finished.set()
+
+    def _is_drained(self) -> bool:
+        return self._in_flight == 0 and not self._rotation and not self._queued
+
+    async def join(self):
+        if self._is_drained():
+            return
+        await self._finished.wait()
+
+    async def close(self):
+        await self._run(self.conn.close)
+        self._executor.shutdown(wait=False)
@@ -32,9 +32,11 @@ class BackendService:
             logger.error(f'insight {insight_id} has no articles')
             return self.build_out(-2, 'can not find articles for insight')
 
-        article_list = [pb.read('articles', fields=['title', 'abstract', 'content', 'url', 'publish_time'], filter=f'id="{_id}"')
-                        for _id in article_ids]
-        article_list = [_article[0] for _article in article_list if _article]
+        # one filtered read instead of a request per article, keep the insight's article order
+        articles = {_article['id']: _article for _article in
+                    pb.iter_read('articles', fields=['id', 'title', 'abstract', 'content', 'url', 'publish_time'],
+                                 filter=' || '.join(f'id="{_id}"' for _id in article_ids))}
+        article_list = [articles[_id] for _id in article_ids if _id in articles]
 
         if not article_list:
             logger.debug(f'{insight_id} has no valid articles')
@@ -150,8 +152,8 @@ class BackendService:
 
         article_ids = insight[0]['articles']
         if article_ids:
-            article_list = [pb.read('articles', fields=['url'], filter=f'id="{_id}"') for _id in article_ids]
-            url_list = [_article[0]['url'] for _article in article_list if _article]
+            url_list = [_article['url'] for _article in
+                        pb.iter_read('articles', fields=['url'], filter=' || '.join(f'id="{_id}"' for _id in article_ids))]
         else:
             url_list = []
 
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+pre_process 等价性测试：用重写前的实现（legacy_pre_process，逐个 str.replace 的版本）作为 oracle，
+对比当前 agents.get_info.pre_process 输出的 link_dict / links_parts / contents 是否完全一致。
+
+python pre_process_equivalence_test.py                 # 扫描 reports 下所有带 markdown 的原始样本 + 内置用例
+python pre_process_equivalence_test.py -F 'json_file_path'
+python pre_process_equivalence_test.py -D 'sample dir'
+
+图片识别用确定性的假函数代替，不会调用 VL 模型。
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import random
+from urllib.parse import urlparse
+
+# 将core目录添加到Python路径
+core_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'core')
+sys.path.append(core_path)
+
+from dotenv import load_dotenv
+env_path = os.path.join(core_path, '.env')
+if os.path.exists(env_path):
+    load_dotenv(env_path)
+
+import regex as re
+from scrapers import *
+from utils.general_utils import normalize_url, url_pattern
+import agents.get_info as get_info_module
+from agents.get_info import pre_process, common_file_exts, common_tlds
+
+
+async def extract_info_from_img(url: str, score: float = None) -> str:
+    # short NA verdicts and longer texts both change later decisions in the same section
+    if sum(map(ord, url)) % 3 == 0:
+        return 'NA'
+    return f'<recognized {url[-12:]}>'
+
+get_info_module.extract_info_from_img = extract_info_from_img
+
+
+async def legacy_pre_process(raw_markdown: str, base_url: str, used_img: list[str], 
+                        recognized_img_cache: dict, existing_urls: set = set(), 
+                        test_mode: bool = False) -> tuple[dict, list[str], list[str], dict]:
+
+    link_dict = {}
+
+    # for special url formate from craw4ai-de 0.4.247
+    raw_markdown = re.sub(r'<javascript:.*?>', '<javascript:>', raw_markdown).strip()
+
+    # 处理图片标记 ![alt](src)，使用非贪婪匹配并考虑嵌套括号的情况
+    i_pattern = r'(!\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\))'
+    matches = re.findall(i_pattern, raw_markdown, re.DOTALL)
+    for _sec, alt, src in matches:
+        # 替换为新格式 §alt||src§
+        raw_markdown = raw_markdown.replace(_sec, f'§{alt}||{src}§', 1)
+
+    async def check_url_text(text) -> tuple[int, str]:
+        score = 0
+        _valid_len = len(text.strip())
+
+        # 找到所有[part0](part1)格式的片段，使用非贪婪匹配并考虑嵌套括号的情况
+        link_pattern = r'(\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\))'
+        matches = re.findall(link_pattern, text, re.DOTALL)
+        for _sec, link_text, link_url in matches:
+            # 存在“”嵌套情况，需要先提取出url
+            _title = re.sub(url_pattern, '', link_url, re.DOTALL).strip()
+            _title = _title.strip('"')
+            link_text = link_text.strip()
+            if _title and _title not in link_text:
+                link_text = f"{_title} - {link_text}"
+            """
+            # for protecting_links model
+            real_url_pattern = r'<(.*?)>'
+            real_url = re.search(real_url_pattern, link_url, re.DOTALL)
+            if real_url:
+                _url = real_url.group(1).strip()
+            else:
+                _url = re.sub(quote_pattern, '', link_url, re.DOTALL).strip()
+            """
+            _url = re.findall(url_pattern, link_url)
+            if not _url or _url[0].startswith(('#', 'javascript:')):
+                text = text.replace(_sec, link_text, 1)
+                continue
+            score += 1
+            _valid_len = _valid_len - len(_sec)
+            url = normalize_url(_url[0], base_url)
+            
+            # 分离§§内的内容和后面的内容
+            img_marker_pattern = r'§(.*?)\|\|(.*?)§'
+            inner_matches = re.findall(img_marker_pattern, link_text, re.DOTALL)
+            for alt, src in inner_matches:
+                link_text = link_text.replace(f'§{alt}||{src}§', '')
+
+            if not link_text and inner_matches:
+                img_alt = inner_matches[0][0].strip()
+                img_src = inner_matches[0][1].strip()
+                if img_src and not img_src.startswith('#'):
+                    img_src = normalize_url(img_src, base_url)
+                    if not img_src:
+                        link_text = img_alt
+                    elif len(img_alt) > 2 or url in existing_urls:
+                        _key = f"[img{len(link_dict)+1}]"
+                        link_dict[_key] = img_src
+                        link_text = img_alt
+                    elif any(img_src.endswith(tld) or img_src.endswith(tld + '/') for tld in common_tlds):
+                        _key = f"[img{len(link_dict)+1}]"
+                        link_dict[_key] = img_src
+                        link_text = img_alt
+                    elif any(img_src.endswith(ext) for ext in common_file_exts if ext not in ['jpg', 'jpeg', 'png']):
+                        _key = f"[img{len(link_dict)+1}]"
+                        link_dict[_key] = img_src
+                        link_text = img_alt
+                    else:
+                        if img_src not in recognized_img_cache:
+                            recognized_img_cache[img_src] = await extract_info_from_img(img_src)
+                        _key = f"[img{len(link_dict)+1}]"
+                        link_dict[_key] = img_src
+                        link_text = recognized_img_cache[img_src]
+                else:
+                    link_text = img_alt
+
+            _key = f"[{len(link_dict)+1}]"
+            link_dict[_key] = url
+            text = text.replace(_sec, link_text + _key, 1)
+ 
+        # 处理文本中的其他图片标记
+        img_pattern = r'(§(.*?)\|\|(.*?)§)'
+        matches = re.findall(img_pattern, text, re.DOTALL)
+        remained_text = re.sub(img_pattern, '', text, re.DOTALL).strip()
+        remained_text_len = len(remained_text)
+        for _sec, alt, src in matches:
+            if not src or src.startswith('#') or src not in used_img:
+                text = text.replace(_sec, alt, 1)
+                continue
+            img_src = normalize_url(src, base_url)
+            if not img_src:
+                text = text.replace(_sec, alt, 1)
+            elif remained_text_len > 5 or len(alt) > 2:
+                _key = f"[{len(link_dict)+1}]"
+                link_dict[_key] = img_src
+                text = text.replace(_sec, alt + _key, 1)
+            elif any(img_src.endswith(tld) or img_src.endswith(tld + '/') for tld in common_tlds):
+                _key = f"[{len(link_dict)+1}]"
+                link_dict[_key] = img_src
+                text = text.replace(_sec, alt + _key, 1)
+            elif any(img_src.endswith(ext) for ext in common_file_exts if ext not in ['jpg', 'jpeg', 'png']):
+                _key = f"[{len(link_dict)+1}]"
+                link_dict[_key] = img_src
+                text = text.replace(_sec, alt + _key, 1)
+            else:
+                if img_src not in recognized_img_cache:
+                    recognized_img_cache[img_src] = await extract_info_from_img(img_src)
+                _key = f"[{len(link_dict)+1}]"
+                link_dict[_key] = img_src
+                text = text.replace(_sec, recognized_img_cache[img_src] + _key, 1)
+
+        # 处理文本中的"野 url"，使用更精确的正则表达式
+        matches = re.findall(url_pattern, text)
+        for url in matches:
+            url = normalize_url(url, base_url)
+            _key = f"[{len(link_dict)+1}]"
+            link_dict[_key] = url
+            text = text.replace(url, _key, 1)
+            score += 1
+            _valid_len = _valid_len - len(url)
+        
+        if score == 0:
+            # 如果没有任何链接，则认为这是一段纯文本
+            return 999, text
+        # 统计换行符数量
+        newline_count = text.count(' * ')
+        score += newline_count
+        ratio = _valid_len/score if score != 0 else 999
+
+        return ratio, text
+
+    sections = raw_markdown.split('# ') # use '# ' to avoid # in url
+    if len(sections) > 2:
+        _sec = sections[0]
+        # 更新正则表达式以处理嵌套括号
+        section_remain = re.sub(r'\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\)', '', _sec, re.DOTALL).strip()
+        section_remain_len = len(section_remain)
+        # 更新正则表达式以处理嵌套括号
+        total_links = len(re.findall(r'\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\)', _sec, re.DOTALL))
+        ratio = total_links / section_remain_len if section_remain_len != 0 else 1
+        if ratio > 0.05:
+            if test_mode:
+                print('\033[31mthis is a navigation section, will be removed\033[0m')
+                print(ratio, '\n')
+                print(section_remain)
+                print('-' * 50)
+            sections = sections[1:]
+        _sec = sections[-1]
+        # 更新正则表达式以处理嵌套括号
+        section_remain = re.sub(r'\[(.*?)\]\(((?:[^()]*|\([^()]*\))*)\)', '', _sec, re.DOTALL).strip()
+        section_remain_len = len(section_remain)
+        if section_remain_len < 198:
+            if test_mode:
+                print('\033[31mthis is a footer section, will be removed\n\033[0m')
+                print(section_remain_len)
+                print(section_remain)
+                print('-' * 50)
+            sections = sections[:-1]
+
+    links_parts = []
+    contents = []
+    for section in sections:
+        ratio, text = await check_url_text(section)
+        if ratio < 90:
+            if test_mode:
+                print('\033[32mthis is a links part\033[0m')
+                print(ratio, '\n')
+                print(text)
+                print('-' * 50)
+            if len(text) > 30000:
+                lines = text.split('\n')
+                _text = ''
+                while lines:
+                    l = lines.pop(0)
+                    _text = f'{_text}{l}\n'
+                    if len(_text) > 29000 or len(lines) == 0:
+                        links_parts.append(_text)
+                        _text = ''
+            else:
+                links_parts.append(text)
+        else:
+            if test_mode:
+                print('\033[34mthis is a content part\033[0m')
+                print(ratio, '\n')
+                print(text)
+                print('-' * 50)
+            if len(text) > 30000:
+                lines = text.split('\n')
+                _text = ''
+                while lines:
+                    l = lines.pop(0)
+                    _text = f'{_text}{l}\n'
+                    if len(_text) > 29000 or len(lines) == 0:
+                        contents.append(_text)
+                        _text = ''
+            else:
+                contents.append(text)
+    return link_dict, links_parts, contents, recognized_img_cache
+
+
+
+def load_sample(file: str):
+    with open(file, 'r', encoding='utf-8') as f:
+        html_sample = json.load(f)
+    if not isinstance(html_sample, dict) or not html_sample.get('markdown'):
+        return None
+    parsed_url = urlparse(html_sample['url'])
+    domain = parsed_url.netloc
+    base_url = ''
+    if domain in custom_scrapers:
+        result = custom_scrapers[domain](html_sample)
+        raw_markdown = result.content
+        used_img = result.images
+        base_url = result.base
+    else:
+        raw_markdown = html_sample['markdown']
+        media_dict = html_sample['media'] if html_sample['media'] else {}
+        used_img = [d['src'] for d in media_dict.get('images', [])]
+    if not base_url:
+        base_url = html_sample.get('base', '')
+    if not base_url:
+        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+    return raw_markdown, base_url, used_img
+
+
+def builtin_cases() -> list[tuple[str, tuple]]:
+    base_url = 'https://example.com/news/'
+    nav = ' '.join(f'[nav{i}](/n/{i})' for i in range(30))
+    article = '正文内容，' * 80
+    cases = [
+        ('duplicated links', (f"{nav}\n# title\n{article}[a](https://a.com/x) and [a](https://a.com/x) again\n# "
+                              f"list\n" + '\n'.join(f'* [item {i}](/item/{i % 7})' for i in range(60)) + f"\n# {article}",
+                              base_url, [])),
+        ('images and image links', (f"# intro {article}\n![logo](/img/logo.png) ![](/img/a.jpg) [![cover](/img/c.jpg)](/post/1)"
+                                    f" [![](/img/d.jpg)](/post/2) ![x](#anchor) ![w](https://cdn.com/w.webp)\n# {article}",
+                                    base_url, ['/img/logo.png', '/img/a.jpg', '/img/c.jpg', '/img/d.jpg', 'https://cdn.com/w.webp'])),
+        ('wild urls and javascript links', (f"# see https://a.com/x and www.b.com or http://c.com//d, [js](javascript:void(0))"
+                                            f" [t](https://a.com/y \"title\") [](#top) {article}\n# tail {article}",
+                                            base_url, [])),
+        ('image only sections', ('# ' + '\n# '.join(f'[![](/img/s{i}.png)](https://example.com/p/{i}) ![](/img/t{i}.png)' for i in range(40)),
+                                 base_url, [f'/img/t{i}.png' for i in range(40)])),
+        ('nested parentheses', (f"# [wiki](https://en.wikipedia.org/wiki/Foo_(bar)) ![p](/a_(1).png) {article}", base_url, ['/a_(1).png'])),
+        ('long section', ('# ' + '\n'.join(f'line {i} [l{i}](/l/{i}) ' + 'x' * 200 for i in range(400)), base_url, [])),
+        ('long content', ('# ' + '\n'.join('长段落' * 60 for _ in range(400)), base_url, [])),
+        ('large listing page', ('# ' + '\n'.join(f'* [headline number {i} of the day](/story/{i}) ![t](/thumb/{i}.jpg) '
+                                                 f'https://s.com/{i} ' + 'y' * 60 for i in range(3000)),
+                                base_url, [f'/thumb/{i}.jpg' for i in range(3000)])),
+    ]
+    # random markdown made of the tokens pre_process cares about
+    rnd = random.Random(20240501)
+    tokens = ['[a](/p/1)', '[b](https://b.com/q?x=1)', '![i](/img/1.png)', '![](/img/2.gif)', '[![c](/img/3.jpg)](/p/3)',
+              'https://w.com/z ', 'www.v.com ', '# ', ' * ', '\n', '\n\n', '文字', 'text ', '[j](javascript:go())', '[h](#x)']
+    for n in range(30):
+        md = ''.join(rnd.choice(tokens) for _ in range(rnd.randint(20, 400)))
+        cases.append((f'random {n}', (md, base_url, ['/img/1.png', '/img/3.jpg'])))
+    return cases
+
+
+async def compare(name: str, raw_markdown: str, base_url: str, used_img: list[str]) -> bool:
+    start = time.perf_counter()
+    expected = await legacy_pre_process(raw_markdown, base_url, used_img, {}, set())
+    legacy_cost = time.perf_counter() - start
+    start = time.perf_counter()
+    got = await pre_process(raw_markdown, base_url, used_img, {}, set())
+    cost = time.perf_counter() - start
+    same = expected[:3] == got[:3]
+    print(f"{'ok  ' if same else 'FAIL'} {name} ({len(raw_markdown)} chars, legacy {legacy_cost*1000:.1f}ms, now {cost*1000:.1f}ms)")
+    if not same:
+        for label, e, g in zip(['link_dict', 'links_parts', 'contents'], expected[:3], got[:3]):
+            if e != g:
+                print(f'  {label} differs:\n  expected: {str(e)[:500]}\n  got:      {str(g)[:500]}')
+    return same
+
+
+async def main(files: list[str]):
+    results = []
+    for file in files:
+        sample = load_sample(file)
+        if sample:
+            results.append(await compare(file, *sample))
+    if not files:
+        for name, case in builtin_cases():
+            results.append(await compare(name, *case))
+    print(f'{sum(results)}/{len(results)} equivalent')
+    return all(results)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--test_file', '-F', type=str, default='')
+    parser.add_argument('--sample_dir', '-D', type=str, default='')
+    args = parser.parse_args()
+
+    files = []
+    if args.test_file:
+        files.append(args.test_file)
+    if args.sample_dir:
+        files.extend([os.path.join(args.sample_dir, file) for file in os.listdir(args.sample_dir) if file.endswith('.json')])
+    if not files:
+        reports_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports')
+        for root, _, names in os.walk(reports_dir):
+            files.extend(os.path.join(root, name) for name in names if name.endswith('.json'))
+        files.sort()
+        # reports + builtin cases, the second group runs even when the first one fails
+        failed = [label for label, group in [('reports', files), ('builtin cases', [])] if not asyncio.run(main(group))]
+        if failed:
+            print(f"not equivalent: {', '.join(failed)}")
+        ok = not failed
+    else:
+        ok = asyncio.run(main(files))
+    sys.exit(0 if ok else 1)
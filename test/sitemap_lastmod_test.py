@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+sitemap lastmod 解析检查：W3C datetime 的各种写法（结尾 Z、只有年份、年-月、日期、带时区的时间）都要得到正确的时间戳，
+python 3.10 的 datetime.fromisoformat 不接受结尾的 Z，这里的用例在 3.10 和 3.11+ 上结果应一致。
+另外用本地模拟的 sitemap 检查：首次运行时没有 lastmod 的 url 只作为基线记录、不返回，之后新增的才返回。
+
+python sitemap_lastmod_test.py
+"""
+import os
+import sys
+import asyncio
+import logging
+import tempfile
+from datetime import datetime, timezone
+import httpx
+
+# 将core目录添加到Python路径
+core_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'core')
+sys.path.append(core_path)
+
+from utils.sitemap_reader import parse_lastmod, SitemapReader
+
+
+def utc(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+cases = [
+    # trailing Z, rejected by fromisoformat before python 3.11
+    ('2024-05-01T10:00:00Z', utc(2024, 5, 1, 10)),
+    ('2024-05-01T10:00:00.250Z', utc(2024, 5, 1, 10, 0, 0, 250000)),
+    ('2024-05-01T10:00Z', utc(2024, 5, 1, 10)),
+    ('2024-05-01T10:00:00z', utc(2024, 5, 1, 10)),
+    # W3C year and year-month forms count as the end of that period
+    ('2024', utc(2025, 1, 1)),
+    ('2024-05', utc(2024, 6, 1)),
+    ('2024-12', utc(2025, 1, 1)),
+    # the forms that already worked
+    ('2024-05-01', utc(2024, 5, 2)),
+    ('2024-05-01T10:00:00+08:00', utc(2024, 5, 1, 2)),
+    ('2024-05-01T10:00:00', utc(2024, 5, 1, 10)),
+    ('  2024-05-01T10:00:00Z\n', utc(2024, 5, 1, 10)),
+    # invalid or missing
+    ('', None),
+    ('2024-13', None),
+    ('2024-00', None),
+    ('yesterday', None),
+    ('Z', None),
+]
+
+
+def sitemap_xml(undated: int, dated: list[str]) -> bytes:
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    entries = [f'<url><loc>https://example.com/old/{i}</loc></url>' for i in range(undated)]
+    entries += [f'<url><loc>{loc}</loc><lastmod>{today}</lastmod></url>' for loc in dated]
+    return ('<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(entries) + '</urlset>').encode('utf-8')
+
+
+async def undated_runs() -> list[tuple[str, list, list]]:
+    """(step, expected urls, got urls) of successive runs over a sitemap whose entries mostly have no lastmod"""
+    pages = {'body': sitemap_xml(1200, ['https://example.com/dated/1'])}
+    reader = SitemapReader(logging.getLogger('sitemap_test'), db_path=os.path.join(tempfile.mkdtemp(), 'sitemaps.db'))
+    reader._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=pages['body'])))
+    url = 'https://example.com/sitemap.xml'
+    steps = [('first run: undated urls are a baseline', ['https://example.com/dated/1'],
+              await reader.fetch('focus', url))]
+    steps.append(('unchanged sitemap', [], await reader.fetch('focus', url)))
+    pages['body'] = sitemap_xml(1203, ['https://example.com/dated/1'])
+    steps.append(('undated urls added after the baseline', [f'https://example.com/old/{i}' for i in range(1200, 1203)],
+                  await reader.fetch('focus', url)))
+    await reader.close()
+    return steps
+
+
+if __name__ == '__main__':
+    failed = 0
+    for value, expected in cases:
+        got = parse_lastmod(value)
+        same = got == expected
+        failed += not same
+        print(f"{'ok  ' if same else 'FAIL'} {value!r}: expected {expected}, got {got}")
+    steps = asyncio.run(undated_runs())
+    for step, expected, got in steps:
+        same = sorted(got or []) == sorted(expected)
+        failed += not same
+        print(f"{'ok  ' if same else 'FAIL'} {step}: expected {len(expected)} urls, got {len(got or [])}")
+    total = len(cases) + len(steps)
+    print(f'{total - failed}/{total} passed')
+    sys.exit(1 if failed else 0)
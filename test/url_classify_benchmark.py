@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+url 分类的微基准：对比原来的 any(url.endswith(x) for x in list) 写法与 utils.url_classifier 的 endswith(tuple) / classify_urls，
+以及字符串 pattern 的 re.findall 与预编译 pattern 的差别。
+
+python url_classify_benchmark.py -N 200000
+"""
+import os
+import sys
+import random
+import timeit
+
+# 将core目录添加到Python路径
+core_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'core')
+sys.path.append(core_path)
+
+import regex as re
+from utils.general_utils import url_pattern
+from utils.url_classifier import common_file_exts, common_tlds, classify_urls, has_common_tld, \
+    has_non_image_file_ext, url_regex
+
+
+def make_urls(n: int) -> list[str]:
+    rnd = random.Random(42)
+    hosts = ['https://www.example.com', 'http://news.sina.com.cn', 'https://mp.weixin.qq.com', 'https://a.io']
+    tails = ['', '/', '/article/12345', '/p/2024/05/01/story.html', '/files/report.pdf', '/img/cover.jpg',
+             '/s?__biz=MzA&mid=2650&idx=1', '/static/app.js', '/feed.xml', '/download/data.zip']
+    return [f'{rnd.choice(hosts)}{rnd.choice(tails)}' for _ in range(n)]
+
+
+def legacy_classify(urls: list[str]) -> list[tuple[bool, bool]]:
+    result = []
+    for url in urls:
+        has_common_ext = any(url.endswith(ext) for ext in common_file_exts)
+        has_common_tld = any(url.endswith(tld) or url.endswith(tld + '/') for tld in common_tlds)
+        result.append((has_common_ext, has_common_tld))
+    return result
+
+
+def legacy_img_checks(urls: list[str]) -> list[tuple[bool, bool]]:
+    return [(any(url.endswith(tld) or url.endswith(tld + '/') for tld in common_tlds),
+             any(url.endswith(ext) for ext in common_file_exts if ext not in ['jpg', 'jpeg', 'png'])) for url in urls]
+
+
+def img_checks(urls: list[str]) -> list[tuple[bool, bool]]:
+    return [(has_common_tld(url), has_non_image_file_ext(url)) for url in urls]
+
+
+def bench(label: str, legacy, new, number: int):
+    legacy_cost = timeit.timeit(legacy, number=number)
+    cost = timeit.timeit(new, number=number)
+    print(f'{label:<28} legacy {legacy_cost * 1000:9.1f}ms   now {cost * 1000:9.1f}ms   x{legacy_cost / cost:5.1f}')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', '-N', type=int, default=200000, help='urls per round')
+    parser.add_argument('--rounds', '-R', type=int, default=3)
+    args = parser.parse_args()
+
+    urls = make_urls(args.number)
+    text = ' see '.join(urls[:2000])
+    # every check runs and is reported, a mismatch does not hide the following ones
+    checks = [('ext + tld classification', legacy_classify(urls) == [tuple(c) for c in classify_urls(urls)]),
+              ('image link checks', legacy_img_checks(urls) == img_checks(urls)),
+              ('url findall', re.findall(url_pattern, text) == url_regex.findall(text))]
+    for label, same in checks:
+        print(f"{'ok  ' if same else 'FAIL'} {label}")
+    if not all(same for _, same in checks):
+        sys.exit(1)
+    short_texts = urls[:20000]
+
+    print(f'{args.number} urls x {args.rounds} rounds')
+    bench('ext + tld classification', lambda: legacy_classify(urls), lambda: classify_urls(urls), args.rounds)
+    bench('image link checks', lambda: legacy_img_checks(urls), lambda: img_checks(urls), args.rounds)
+    bench('url findall, short texts', lambda: [re.findall(url_pattern, t) for t in short_texts],
+          lambda: [url_regex.findall(t) for t in short_texts], args.rounds)